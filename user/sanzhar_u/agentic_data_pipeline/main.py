@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+import hashlib
 import logging
 import shutil
 from pathlib import Path
@@ -15,13 +16,18 @@ from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-from src.core import PipelineBuilder
+from src.core import PipelineBuilder, LoggingEventSink, JsonlEventSink, PrometheusTextfileSink
+from src.core.tracing import Tracer, set_tracer
 from src.config import create_image_collection_config
 from src.nodes import (
     extract_categories_node,
     generate_subcategories_node,
     generate_keywords_node,
-    collect_data_node
+    dedupe_keywords_node,
+    collect_data_node,
+    collection_pending,
+    dispatch_categories,
+    process_category_node
 )
 
 logging.basicConfig(
@@ -56,8 +62,17 @@ def get_llm(provider: str = None, model: str = None, **kwargs):
             raise ValueError("LLM_API_KEY environment variable not set")
         return ChatGoogleGenerativeAI(model=model, google_api_key=api_key, temperature=0.7)
     
+    elif provider.lower() == "fake":
+        # Offline, deterministic answers for dry runs and benchmarks
+        from src.testing import FakeChatModel
+        recordings = os.getenv("FAKE_LLM_RECORDINGS")
+        latency = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+        if recordings:
+            return FakeChatModel.from_recordings(recordings, latency=latency)
+        return FakeChatModel(latency=latency)
+    
     else:
-        raise ValueError(f"Unsupported provider: {provider}. Use 'openai', 'anthropic', or 'google'")
+        raise ValueError(f"Unsupported provider: {provider}. Use 'openai', 'anthropic', 'google' or 'fake'")
 
 
 def find_chromedriver(webdriver_dir: str = None) -> str:
@@ -96,7 +111,25 @@ def create_graph(
     headless: bool = True,
     min_resolution: tuple = (400, 400),
     max_resolution: tuple = (8000, 8000),
-    max_missed: int = 200
+    max_missed: int = 200,
+    browser_pool_size: int = 2,
+    driver_max_uses: int = 25,
+    download_concurrency: int = 8,
+    dedup_images: bool = True,
+    max_concurrency: int = 8,
+    requests_per_minute: float = 40.0,
+    max_retries: int = 2,
+    fan_out: bool = False,
+    incremental: bool = True,
+    checkpoint_path: Optional[str] = None,
+    structured_output: bool = False,
+    keyword_batch_size: int = 8,
+    keyword_dedup: bool = True,
+    keyword_similarity: float = 0.8,
+    dedup_budget_factor: float = 2.0,
+    llm_cache_path: Optional[str] = None,
+    llm_cache_ttl: Optional[float] = None,
+    llm_cache_max_entries: Optional[int] = None
 ):
     llm = get_llm(provider=llm_provider, model=llm_model, api_key=llm_api_key)
     
@@ -114,17 +147,48 @@ def create_graph(
         headless=headless,
         min_resolution=min_resolution,
         max_resolution=max_resolution,
-        max_missed=max_missed
+        max_missed=max_missed,
+        browser_pool_size=browser_pool_size,
+        driver_max_uses=driver_max_uses,
+        download_concurrency=download_concurrency,
+        dedup_images=dedup_images,
+        max_concurrency=max_concurrency,
+        requests_per_minute=requests_per_minute,
+        max_retries=max_retries,
+        # Reruns reuse persisted LLM stage outputs and skip keywords that are already complete
+        skip_complete=incremental,
+        cache_path=os.path.join(os.path.abspath(data_path), "stage_cache.sqlite") if incremental else None,
+        structured_output=structured_output,
+        keyword_batch_size=keyword_batch_size,
+        keyword_dedup=keyword_dedup,
+        keyword_similarity=keyword_similarity,
+        dedup_budget_factor=dedup_budget_factor,
+        llm_cache_path=llm_cache_path,
+        llm_cache_ttl=llm_cache_ttl,
+        llm_cache_max_entries=llm_cache_max_entries
     )
     
-    builder = PipelineBuilder(config.to_dict())
+    checkpointer = None
+    if checkpoint_path:
+        # Imported lazily so the checkpoint backend is only needed when checkpointing is on
+        from src.core.checkpoint import create_sqlite_checkpointer
+        checkpointer = create_sqlite_checkpointer(checkpoint_path)
+    
+    builder = PipelineBuilder(config.to_dict(), checkpointer=checkpointer)
     
     builder.set_entry_point("extract_categories")
     builder.add_node("extract_categories", extract_categories_node)
-    builder.add_node("generate_subcategories", generate_subcategories_node)
-    builder.add_node("generate_keywords", generate_keywords_node)
-    builder.add_node("collect_data", collect_data_node)
-    builder.connect_to_end("collect_data")
+    if fan_out:
+        # One branch per category runs subcategories -> keywords -> collection independently
+        builder.add_fan_out("process_category", process_category_node, dispatch_categories)
+        builder.connect_to_end("process_category")
+    else:
+        builder.add_node("generate_subcategories", generate_subcategories_node)
+        builder.add_node("generate_keywords", generate_keywords_node)
+        if keyword_dedup:
+            builder.add_node("dedupe_keywords", dedupe_keywords_node)
+        # Loops once per keyword batch so each batch is checkpointed
+        builder.add_loop("collect_data", collect_data_node, collection_pending)
     
     workflow = builder.build()
     
@@ -168,6 +232,24 @@ def main():
     max_resolution = tuple(int(x.strip()) for x in max_res_env[:2])
     
     max_missed = int(os.getenv("MAX_MISSED", "200"))
+    browser_pool_size = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+    driver_max_uses = int(os.getenv("DRIVER_MAX_USES", "25"))
+    download_concurrency = int(os.getenv("DOWNLOAD_CONCURRENCY", "8"))
+    dedup_images = os.getenv("DEDUP_IMAGES", "true").lower() in ("true", "1", "yes")
+    max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    requests_per_minute = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "40"))
+    max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    fan_out = os.getenv("FAN_OUT", "false").lower() in ("true", "1", "yes")
+    incremental = os.getenv("INCREMENTAL", "true").lower() in ("true", "1", "yes")
+    checkpointing = os.getenv("CHECKPOINTING", "true").lower() in ("true", "1", "yes")
+    structured_output = os.getenv("STRUCTURED_OUTPUT", "false").lower() in ("true", "1", "yes")
+    keyword_batch_size = int(os.getenv("KEYWORD_BATCH_SIZE", "8"))
+    keyword_dedup = os.getenv("DEDUP_KEYWORDS", "true").lower() in ("true", "1", "yes")
+    keyword_similarity = float(os.getenv("KEYWORD_SIMILARITY", "0.8"))
+    dedup_budget_factor = float(os.getenv("DEDUP_BUDGET_FACTOR", "2.0"))
+    llm_cache_path = os.getenv("LLM_CACHE_PATH")
+    llm_cache_ttl = float(os.getenv("LLM_CACHE_TTL")) if os.getenv("LLM_CACHE_TTL") else None
+    llm_cache_max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES")) if os.getenv("LLM_CACHE_MAX_ENTRIES") else None
     data_dir = os.getenv("DATA_DIR", "data")
     output_file = os.getenv("OUTPUT_FILE", "results.json")
     webdriver_dir = os.getenv("WEBDRIVER_DIR")
@@ -197,14 +279,53 @@ def main():
         headless=headless,
         min_resolution=min_resolution,
         max_resolution=max_resolution,
-        max_missed=max_missed
+        max_missed=max_missed,
+        browser_pool_size=browser_pool_size,
+        driver_max_uses=driver_max_uses,
+        download_concurrency=download_concurrency,
+        dedup_images=dedup_images,
+        max_concurrency=max_concurrency,
+        requests_per_minute=requests_per_minute,
+        max_retries=max_retries,
+        fan_out=fan_out,
+        incremental=incremental,
+        checkpoint_path=(os.getenv("CHECKPOINT_PATH") or os.path.join(data_dir, "checkpoints.sqlite")) if checkpointing else None,
+        structured_output=structured_output,
+        keyword_batch_size=keyword_batch_size,
+        keyword_dedup=keyword_dedup,
+        keyword_similarity=keyword_similarity,
+        dedup_budget_factor=dedup_budget_factor,
+        llm_cache_path=llm_cache_path,
+        llm_cache_ttl=llm_cache_ttl,
+        llm_cache_max_entries=llm_cache_max_entries
     )
     
     initial_state = builder.create_initial_state(free_text=free_text)
+    # Rerunning the same input continues the same thread, resuming it if it was interrupted
+    thread_id = os.getenv("THREAD_ID") or hashlib.sha256(free_text.encode("utf-8")).hexdigest()[:16]
+    
+    # Live progress: log lines always, plus a JSONL event log and a Prometheus textfile when configured
+    sinks = [LoggingEventSink()]
+    events_file = os.getenv("EVENTS_FILE", os.path.join(data_dir, "events.jsonl"))
+    if events_file:
+        sinks.append(JsonlEventSink(events_file))
+    metrics_file = os.getenv("METRICS_TEXTFILE")
+    if metrics_file:
+        sinks.append(PrometheusTextfileSink(metrics_file))
+    
+    # Span tracing of agents, scraper phases and nodes, exported as a Chrome trace at the end
+    trace_file = os.getenv("TRACE_FILE")
+    tracer = Tracer() if trace_file else None
+    if tracer:
+        set_tracer(tracer)
     
     logger.info("Starting workflow with text: %s", free_text[:100] + "..." if len(free_text) > 100 else free_text)
     try:
-        results = graph.invoke(initial_state)
+        logger.info("Thread id: %s", thread_id)
+        results = {}
+        for event in builder.workflow.stream(initial_state, thread_id=thread_id, sinks=sinks):
+            if event.state is not None:
+                results = event.state
         
         save_results(results, output_file)
         
@@ -238,6 +359,21 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if tracer:
+            tracer.export_chrome_trace(trace_file)
+            logger.info("Span summary:\n%s", tracer.format_summary())
+        for sink in sinks:
+            sink.close()
+        config.collection_executor.close()
+        config.collector.close()
+        if builder.workflow.checkpointer is not None:
+            builder.workflow.checkpointer.conn.close()
+        if config.stage_cache is not None:
+            config.stage_cache.close()
+        if config.llm_cache is not None:
+            logger.info("LLM cache: %s", config.llm_cache.stats())
+            config.llm_cache.close()
 
 
 if __name__ == "__main__":
@@ -254,7 +390,19 @@ try:
         headless=os.getenv("HEADLESS", "true").lower() == "true",
         min_resolution=(400, 400),
         max_resolution=(8000, 8000),
-        max_missed=200
+        max_missed=200,
+        browser_pool_size=int(os.getenv("BROWSER_POOL_SIZE", "2")),
+        driver_max_uses=int(os.getenv("DRIVER_MAX_USES", "25")),
+        download_concurrency=int(os.getenv("DOWNLOAD_CONCURRENCY", "8")),
+        dedup_images=os.getenv("DEDUP_IMAGES", "true").lower() == "true",
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "40")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        fan_out=os.getenv("FAN_OUT", "false").lower() == "true",
+        incremental=os.getenv("INCREMENTAL", "true").lower() == "true",
+        structured_output=os.getenv("STRUCTURED_OUTPUT", "false").lower() == "true",
+        keyword_batch_size=int(os.getenv("KEYWORD_BATCH_SIZE", "8")),
+        keyword_dedup=os.getenv("DEDUP_KEYWORDS", "true").lower() == "true"
     )
 except Exception as e:
     logger.warning(f"Could not create graph for LangGraph Studio: {e}")
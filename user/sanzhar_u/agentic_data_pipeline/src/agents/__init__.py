@@ -2,6 +2,18 @@ from .base_agent import BaseAgent
 from .category_agent import CategoryAgent
 from .subcategory_agent import SubcategoryAgent
 from .keyword_agent import KeywordAgent
+from .parsing import parse_json_output
+from .schemas import CategoryList, SubcategoryList, KeywordList, SubcategoryKeywordsList
 
-__all__ = ["BaseAgent", "CategoryAgent", "SubcategoryAgent", "KeywordAgent"]
+__all__ = [
+    "BaseAgent",
+    "CategoryAgent",
+    "SubcategoryAgent",
+    "KeywordAgent",
+    "parse_json_output",
+    "CategoryList",
+    "SubcategoryList",
+    "KeywordList",
+    "SubcategoryKeywordsList"
+]
 
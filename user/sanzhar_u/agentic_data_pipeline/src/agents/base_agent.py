@@ -1,17 +1,50 @@
+import hashlib
 import logging
-from typing import Any, Dict
+import threading
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Type
+from pydantic import BaseModel
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.runnables import Runnable
+
+from ..core.concurrency import gather_limited, run_async
+from ..core.tracing import get_tracer
+from .parsing import parse_json_output
 
 logger = logging.getLogger(__name__)
 
 
 class BaseAgent:
-    def __init__(self, llm: BaseChatModel, system_prompt: str):
+    # Bump when a user message template changes, so cached stage outputs are regenerated
+    PROMPT_VERSION = "1"
+    # Pydantic model of the agent's answer, requested natively in structured-output mode
+    OUTPUT_SCHEMA: Optional[Type[BaseModel]] = None
+    
+    def __init__(self, llm: BaseChatModel, system_prompt: str, structured_output: bool = False):
         self.llm = llm
         self.system_prompt = system_prompt
-        self.parser = JsonOutputParser()
+        # Built once; each call only formats the template
+        self.prompt = self._create_prompt()
+        self.structured_output = structured_output
+        self._structured_llms: Dict[Type[BaseModel], Optional[Runnable]] = {}
+        self.structured_llm = self._get_structured_llm(self.OUTPUT_SCHEMA)
+    
+    @property
+    def cache_identity(self) -> Dict[str, Any]:
+        """Everything besides the call inputs that determines this agent's output."""
+        identity = {
+            "agent": type(self).__name__,
+            "prompt_version": self.PROMPT_VERSION,
+            "system_prompt": hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest(),
+            "model": type(self.llm).__name__,
+            "model_params": self.llm._identifying_params
+        }
+        if self.structured_llm is not None:
+            identity["structured_output"] = True
+        return identity
     
     def _create_prompt(self) -> ChatPromptTemplate:
         return ChatPromptTemplate.from_messages([
@@ -19,13 +52,131 @@ class BaseAgent:
             ("user", "{user_message}")
         ])
     
-    def invoke(self, user_message: str, **kwargs) -> Dict[str, Any]:
+    def _get_structured_llm(self, schema: Optional[Type[BaseModel]]) -> Optional[Runnable]:
+        """The model bound to `schema`, created once per schema; None in text mode or when unsupported."""
+        if not self.structured_output or schema is None:
+            return None
+        if schema not in self._structured_llms:
+            try:
+                # include_raw keeps the raw message, so a failed validation can still be parsed by hand
+                self._structured_llms[schema] = self.llm.with_structured_output(schema, include_raw=True)
+            except NotImplementedError:
+                logger.warning(
+                    "%s does not support structured output, %s falls back to JSON parsing",
+                    type(self.llm).__name__,
+                    type(self).__name__
+                )
+                self._structured_llms[schema] = None
+        return self._structured_llms[schema]
+    
+    @staticmethod
+    def _parse_message(message: BaseMessage) -> Dict[str, Any]:
+        # `message.text` is a method before langchain-core 1.0 and a property after, so the content is read directly
+        content = message.content
+        if not isinstance(content, str):
+            content = "".join(
+                block if isinstance(block, str) else block.get("text", "")
+                for block in content
+                if isinstance(block, str) or block.get("type") == "text"
+            )
+        return parse_json_output(content)
+    
+    def _parse_structured(self, output: Dict[str, Any]) -> Dict[str, Any]:
+        parsed = output.get("parsed")
+        if isinstance(parsed, BaseModel):
+            return parsed.model_dump()
+        if parsed is not None:
+            return parsed
+        
+        logger.debug("%s structured output failed validation: %s", type(self).__name__, output.get("parsing_error"))
+        raw = output["raw"]
+        tool_calls = getattr(raw, "tool_calls", None)
+        if tool_calls:
+            return tool_calls[0]["args"]
+        return self._parse_message(raw)
+    
+    def invoke(self, user_message: str, schema: Optional[Type[BaseModel]] = None, **kwargs) -> Dict[str, Any]:
+        """Answer one message; `schema` overrides OUTPUT_SCHEMA for structured output."""
+        # The model call and JSON parsing run as separate steps so each gets its own span
+        tracer = get_tracer()
+        agent = type(self).__name__
+        structured_llm = self._get_structured_llm(schema or self.OUTPUT_SCHEMA)
         try:
-            prompt = self._create_prompt()
-            chain = prompt | self.llm | self.parser
-            result = chain.invoke({"user_message": user_message}, **kwargs)
-            return result
+            messages = self.prompt.invoke({"user_message": user_message}, **kwargs)
+            if structured_llm is not None:
+                with tracer.span("agent.llm", agent=agent, structured=True):
+                    output = structured_llm.invoke(messages, **kwargs)
+                with tracer.span("agent.parse", agent=agent):
+                    return self._parse_structured(output)
+            
+            with tracer.span("agent.llm", agent=agent):
+                response = self.llm.invoke(messages, **kwargs)
+            with tracer.span("agent.parse", agent=agent):
+                return self._parse_message(response)
         except Exception as e:
             logger.error("Error invoking agent: %s", e)
             raise
-
+    
+    async def ainvoke(self, user_message: str, schema: Optional[Type[BaseModel]] = None, **kwargs) -> Dict[str, Any]:
+        tracer = get_tracer()
+        agent = type(self).__name__
+        structured_llm = self._get_structured_llm(schema or self.OUTPUT_SCHEMA)
+        try:
+            messages = await self.prompt.ainvoke({"user_message": user_message}, **kwargs)
+            if structured_llm is not None:
+                with tracer.span("agent.llm", agent=agent, structured=True):
+                    output = await structured_llm.ainvoke(messages, **kwargs)
+                with tracer.span("agent.parse", agent=agent):
+                    return self._parse_structured(output)
+            
+            with tracer.span("agent.llm", agent=agent):
+                response = await self.llm.ainvoke(messages, **kwargs)
+            with tracer.span("agent.parse", agent=agent):
+                return self._parse_message(response)
+        except Exception as e:
+            logger.error("Error invoking agent: %s", e)
+            raise
+    
+    async def abatch(
+        self,
+        user_messages: List[str],
+        schema: Optional[Type[BaseModel]] = None,
+        parse: Optional[Callable[[int, Dict[str, Any]], Any]] = None,
+        on_result: Optional[Callable[[int, Any], None]] = None,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[BaseRateLimiter] = None,
+        max_retries: int = 0,
+        latencies: Optional[List[float]] = None,
+        slots: Optional[threading.BoundedSemaphore] = None
+    ) -> List[Any]:
+        """
+        Invoke the agent on every message with at most `max_concurrency` calls in flight;
+        nodes pass `call_options(config)` for the pipeline's limits. `parse(index, result)`
+        turns each answer into the value returned for it and runs inside the call, so an
+        answer it rejects is retried like a failed request. `on_result(index, value)` is
+        called as soon as each call succeeds, e.g. to persist it before the rest finish.
+        
+        Results come back in input order; a message that still fails after `max_retries`
+        yields its exception instead of a result.
+        """
+        async def _call(index: int, message: str) -> Any:
+            result = await self.ainvoke(message, schema=schema)
+            value = parse(index, result) if parse else result
+            if on_result is not None:
+                on_result(index, value)
+            return value
+        
+        calls = [partial(_call, i, message) for i, message in enumerate(user_messages)]
+        with get_tracer().span("agent.batch", agent=type(self).__name__, size=len(user_messages)):
+            return await gather_limited(
+                calls,
+                max_concurrency=max_concurrency,
+                rate_limiter=rate_limiter,
+                max_retries=max_retries,
+                latencies=latencies,
+                slots=slots
+            )
+    
+    def batch(self, user_messages: List[str], **kwargs: Any) -> List[Any]:
+        """Blocking variant of abatch, usable from sync nodes."""
+        return run_async(self.abatch(user_messages, **kwargs))
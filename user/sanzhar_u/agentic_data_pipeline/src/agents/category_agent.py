@@ -2,12 +2,15 @@ import logging
 from typing import List, Dict, Any
 from langchain_core.language_models import BaseChatModel
 from .base_agent import BaseAgent
+from .schemas import CategoryList
 
 logger = logging.getLogger(__name__)
 
 
 class CategoryAgent(BaseAgent):
     
+    OUTPUT_SCHEMA = CategoryList
+    
     SYSTEM_PROMPT = """You are an expert cultural anthropologist and data analyst specializing in comprehensive cultural documentation and analysis.
 
 Your task is to generate detailed, comprehensive categories for documenting and understanding a specific culture, country, or region. You should create categories that capture the full spectrum of cultural expression, social practices, traditions, and contemporary trends.
@@ -98,8 +101,8 @@ Generate 8-15 comprehensive categories that together provide a complete picture
 
 Return only valid JSON."""
 
-    def __init__(self, llm: BaseChatModel):
-        super().__init__(llm, self.SYSTEM_PROMPT)
+    def __init__(self, llm: BaseChatModel, structured_output: bool = False):
+        super().__init__(llm, self.SYSTEM_PROMPT, structured_output)
     
     def extract_categories(self, country_or_culture: str) -> List[Dict[str, str]]:
         user_message = f"""Generate comprehensive data categories for documenting and understanding the culture, customs, traditions, and recent trends of: {country_or_culture}
@@ -1,12 +1,29 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_core.language_models import BaseChatModel
 from .base_agent import BaseAgent
+from .schemas import KeywordList, SubcategoryKeywordsList
 
 logger = logging.getLogger(__name__)
 
+# Rough output cost of one subcategory's 8-12 keywords plus its JSON framing
+TOKENS_PER_SUBCATEGORY = 250
+# Assumed when the model does not expose its output limit
+DEFAULT_OUTPUT_TOKENS = 8192
+
+
+def output_token_limit(llm: BaseChatModel) -> Optional[int]:
+    """The model's configured output token cap, under whichever name its provider uses."""
+    for attr in ("max_tokens", "max_output_tokens", "max_completion_tokens", "num_predict"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
 
 class KeywordAgent(BaseAgent):
+    OUTPUT_SCHEMA = KeywordList
+    
     SYSTEM_PROMPT = """You are an expert at creating effective search keywords for internet search engines (Google, Bing, etc.) and data collection.
 
 Your task is to generate specific, searchable keywords that would return relevant data (images, text, etc.) for a given subcategory within a cultural context.
@@ -55,25 +72,12 @@ Generate 8-12 effective keywords per subcategory. The keywords MUST include both
 
 Return only valid JSON."""
 
-    def __init__(self, llm: BaseChatModel):
-        super().__init__(llm, self.SYSTEM_PROMPT)
+    def __init__(self, llm: BaseChatModel, structured_output: bool = False):
+        super().__init__(llm, self.SYSTEM_PROMPT, structured_output)
     
-    def generate_keywords(
-        self,
-        category_name: str,
-        subcategory_name: str,
-        subcategory_description: str,
-        country_or_culture: str = ""
-    ) -> List[str]:
-        country_context = f"\n\nCountry/Culture: {country_or_culture}" if country_or_culture else ""
-        
-        user_message = f"""Generate effective search keywords for internet search engines (Google, Bing, etc.) for the following subcategory:
-
-Category: {category_name}
-Subcategory: {subcategory_name}
-Subcategory Description: {subcategory_description}{country_context}
-
-REQUIREMENT: Generate 8-12 search keywords that MUST include BOTH native language(s) AND English keywords.
+    @staticmethod
+    def _requirements(country_or_culture: str = "") -> str:
+        return f"""REQUIREMENT: Generate 8-12 search keywords that MUST include BOTH native language(s) AND English keywords.
 
 1. **Native Language Keywords** (40-50% of keywords):
    - Keywords in the native language(s) of {country_or_culture or "the country/culture"}
@@ -100,22 +104,145 @@ REQUIREMENT: Generate 8-12 search keywords that MUST include BOTH native languag
    - Optimize for Google Images and web search
    - Consider regional search patterns
 
-IMPORTANT: The keyword list should be balanced between native language(s) and English. Both are essential for comprehensive data collection.
+IMPORTANT: The keyword list should be balanced between native language(s) and English. Both are essential for comprehensive data collection."""
+    
+    def batch_size(self, max_batch_size: int) -> int:
+        """How many subcategories fit in one request, at most `max_batch_size`, leaving a quarter of the output limit spare."""
+        limit = output_token_limit(self.llm) or DEFAULT_OUTPUT_TOKENS
+        return max(1, min(max_batch_size, int(limit * 0.75) // TOKENS_PER_SUBCATEGORY))
+    
+    def _build_user_message(
+        self,
+        category_name: str,
+        subcategory_name: str,
+        subcategory_description: str,
+        country_or_culture: str = ""
+    ) -> str:
+        country_context = f"\n\nCountry/Culture: {country_or_culture}" if country_or_culture else ""
+        
+        return f"""Generate effective search keywords for internet search engines (Google, Bing, etc.) for the following subcategory:
+
+Category: {category_name}
+Subcategory: {subcategory_name}
+Subcategory Description: {subcategory_description}{country_context}
+
+{self._requirements(country_or_culture)}
 
 Return a simple list of keyword strings."""
+    
+    def _build_batch_user_message(
+        self,
+        category_name: str,
+        subcategories: List[Dict[str, str]],
+        country_or_culture: str = ""
+    ) -> str:
+        country_context = f"\n\nCountry/Culture: {country_or_culture}" if country_or_culture else ""
+        listing = "\n".join(
+            f"{i}. Subcategory: {subcategory['name']}\n   Subcategory Description: {subcategory.get('description', '')}"
+            for i, subcategory in enumerate(subcategories, 1)
+        )
+        
+        return f"""Generate effective search keywords for internet search engines (Google, Bing, etc.) for EACH of the following subcategories:
+
+Category: {category_name}{country_context}
+
+{listing}
+
+{self._requirements(country_or_culture)}
+
+The requirement applies to every subcategory separately. Instead of a single keyword list, output a JSON object with the following structure, with one entry per subcategory and the subcategory name copied exactly:
+{{
+    "subcategories": [
+        {{"name": "subcategory name", "keywords": ["search keyword phrase 1", "search keyword phrase 2"]}}
+    ]
+}}"""
+    
+    @staticmethod
+    def _parse_keywords(result: Dict[str, Any]) -> List[str]:
+        keywords = result.get("keywords", [])
+        
+        if keywords and isinstance(keywords[0], dict):
+            keywords = [kw.get("keyword", "") for kw in keywords if kw.get("keyword")]
+        
+        return [kw for kw in keywords if kw and isinstance(kw, str)]
+    
+    def generate_keywords(
+        self,
+        category_name: str,
+        subcategory_name: str,
+        subcategory_description: str,
+        country_or_culture: str = ""
+    ) -> List[str]:
+        user_message = self._build_user_message(
+            category_name, subcategory_name, subcategory_description, country_or_culture
+        )
         
         try:
             result = self.invoke(user_message)
-            keywords = result.get("keywords", [])
-            
-            if keywords and isinstance(keywords[0], dict):
-                keywords = [kw.get("keyword", "") for kw in keywords if kw.get("keyword")]
-            
-            keywords = [kw for kw in keywords if kw and isinstance(kw, str)]
+            keywords = self._parse_keywords(result)
             
             logger.info("Generated %d keywords for subcategory '%s'", len(keywords), subcategory_name)
             return keywords
         except Exception as e:
             logger.error("Error generating keywords: %s", e)
             return []
-
+    
+    def generate_keywords_many(self, requests: List[Dict[str, str]], **options: Any) -> List[Any]:
+        """
+        Generate keywords for every request (the keyword arguments of generate_keywords)
+        through `batch`, which `options` are passed to. Each result is the keyword list or,
+        after failed retries, the exception.
+        """
+        user_messages = [self._build_user_message(**request) for request in requests]
+        return self.batch(user_messages, parse=lambda _, result: self._parse_keywords(result), **options)
+    
+    def _split_batch(self, result: Dict[str, Any], subcategories: List[Dict[str, str]]) -> Dict[str, List[str]]:
+        """
+        Map a batched answer back onto the requested subcategory names. Names are matched
+        case-insensitively; unknown names and empty keyword lists are dropped, so anything
+        missing from the returned map has to be requested again.
+        """
+        names = {subcategory["name"].strip().casefold(): subcategory["name"] for subcategory in subcategories}
+        entries = result.get("subcategories", [])
+        # Some models answer with a plain {name: keywords} map instead of the requested list
+        if isinstance(entries, dict):
+            entries = [{"name": name, "keywords": keywords} for name, keywords in entries.items()]
+        
+        keywords_by_subcategory = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get("keywords"), list):
+                continue
+            name = names.get(str(entry.get("name", "")).strip().casefold())
+            keywords = self._parse_keywords({"keywords": entry["keywords"]})
+            if name and keywords:
+                keywords_by_subcategory.setdefault(name, keywords)
+        return keywords_by_subcategory
+    
+    def generate_keyword_batches(
+        self,
+        batches: List[Tuple[str, List[Dict[str, str]]]],
+        country_or_culture: str = "",
+        **options: Any
+    ) -> List[Any]:
+        """
+        Generate keywords for several subcategories of one category per request, one
+        request per (category name, subcategories) batch, through `batch`. Each result maps
+        the subcategories that came back valid to their keywords or, after failed retries,
+        is the exception.
+        """
+        def _parse(index: int, result: Dict[str, Any]) -> Dict[str, List[str]]:
+            category_name, subcategories = batches[index]
+            keywords_by_subcategory = self._split_batch(result, subcategories)
+            logger.info(
+                "Generated keywords for %d of %d subcategories of '%s' in one request",
+                len(keywords_by_subcategory),
+                len(subcategories),
+                category_name
+            )
+            return keywords_by_subcategory
+        
+        user_messages = [
+            self._build_batch_user_message(category_name, subcategories, country_or_culture)
+            for category_name, subcategories in batches
+        ]
+        return self.batch(user_messages, schema=SubcategoryKeywordsList, parse=_parse, **options)
@@ -0,0 +1,65 @@
+import re
+import json
+from typing import Any, List, Tuple
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE.search(text)
+    if match:
+        text = match.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    return text[min(starts):] if starts else text
+
+
+def _cut_points(text: str) -> List[Tuple[int, str]]:
+    """
+    Positions right after each complete element inside a container, each paired with
+    the brackets needed to close everything still open at that point.
+    """
+    points = []
+    stack = []
+    in_string = escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            points.append((i + 1, "".join(reversed(stack))))
+        elif char == ",":
+            points.append((i, "".join(reversed(stack))))
+    return points
+
+
+def parse_json_output(text: str, max_repairs: int = 16) -> Any:
+    """
+    Parse a model's JSON answer that may be wrapped in markdown fences or surrounding
+    prose, or cut off by the output limit. A truncated answer is cut back to its last
+    complete element and closed, so the items generated before the cut are kept.
+
+    Raises ValueError when no JSON can be recovered.
+    """
+    body = _strip_fences(text).strip()
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError:
+        pass
+
+    for end, closers in reversed(_cut_points(body)[-max_repairs:]):
+        try:
+            return json.loads(body[:end] + closers)
+        except json.JSONDecodeError:
+            continue
+    raise ValueError(f"Could not parse JSON from model output: {text[:200]!r}")
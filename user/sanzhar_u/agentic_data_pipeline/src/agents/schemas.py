@@ -0,0 +1,37 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class Category(BaseModel):
+    name: str = Field(description="Category name in English")
+    description: str = Field(default="", description="What the category represents and what data it encompasses")
+
+
+class CategoryList(BaseModel):
+    """Cultural categories for the requested country or culture."""
+    categories: List[Category]
+
+
+class Subcategory(BaseModel):
+    name: str = Field(description="Subcategory name in English")
+    description: str = Field(default="", description="What the subcategory represents within its category")
+
+
+class SubcategoryList(BaseModel):
+    """Subcategories of one cultural category."""
+    subcategories: List[Subcategory]
+
+
+class KeywordList(BaseModel):
+    """Search engine keywords for one subcategory."""
+    keywords: List[str] = Field(description="Search keywords in the native language(s) and English")
+
+
+class SubcategoryKeywords(BaseModel):
+    name: str = Field(description="Subcategory name exactly as given in the request")
+    keywords: List[str] = Field(description="Search keywords in the native language(s) and English")
+
+
+class SubcategoryKeywordsList(BaseModel):
+    """Search engine keywords for several subcategories of one category."""
+    subcategories: List[SubcategoryKeywords]
@@ -2,6 +2,7 @@ import logging
 from typing import List, Dict, Any
 from langchain_core.language_models import BaseChatModel
 from .base_agent import BaseAgent
+from .schemas import SubcategoryList
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +10,8 @@ logger = logging.getLogger(__name__)
 class SubcategoryAgent(BaseAgent):
     """Agent that generates comprehensive subcategories for cultural categories."""
     
+    OUTPUT_SCHEMA = SubcategoryList
+    
     SYSTEM_PROMPT = """You are an expert cultural analyst specializing in breaking down broad cultural categories into specific, meaningful, and comprehensive subcategories.
 
 Your task is to analyze a cultural category within the context of a specific country or culture and create a detailed, professional list of subcategories that would help organize data collections more granularly and comprehensively.
@@ -51,18 +54,18 @@ Generate 4-10 comprehensive, well-described subcategories per category. Each sub
 
 Return only valid JSON."""
 
-    def __init__(self, llm: BaseChatModel):
-        super().__init__(llm, self.SYSTEM_PROMPT)
+    def __init__(self, llm: BaseChatModel, structured_output: bool = False):
+        super().__init__(llm, self.SYSTEM_PROMPT, structured_output)
     
-    def generate_subcategories(
-        self, 
-        category_name: str, 
+    def _build_user_message(
+        self,
+        category_name: str,
         category_description: str,
         country_or_culture: str = ""
-    ) -> List[Dict[str, str]]:
+    ) -> str:
         country_context = f"\n\nCountry/Culture Context: {country_or_culture}" if country_or_culture else ""
         
-        user_message = f"""Generate comprehensive subcategories for the following cultural category:
+        return f"""Generate comprehensive subcategories for the following cultural category:
 
 Category: {category_name}
 Category Description: {category_description}{country_context}
@@ -75,6 +78,14 @@ Create detailed, professional subcategories that:
 - Reflect authentic cultural expressions
 
 Provide a thorough breakdown that would enable comprehensive data collection for this category within the specified cultural context."""
+    
+    def generate_subcategories(
+        self, 
+        category_name: str, 
+        category_description: str,
+        country_or_culture: str = ""
+    ) -> List[Dict[str, str]]:
+        user_message = self._build_user_message(category_name, category_description, country_or_culture)
         
         try:
             result = self.invoke(user_message)
@@ -84,4 +95,12 @@ Provide a thorough breakdown that would enable comprehensive data collection for
         except Exception as e:
             logger.error("Error generating subcategories: %s", e)
             return []
-
+    
+    def generate_subcategories_many(self, requests: List[Dict[str, str]], **options: Any) -> List[Any]:
+        """
+        Generate subcategories for every request (the keyword arguments of
+        generate_subcategories) through `batch`, which `options` are passed to.
+        Each result is the subcategory list or, after failed retries, the exception.
+        """
+        user_messages = [self._build_user_message(**request) for request in requests]
+        return self.batch(user_messages, parse=lambda _, result: result.get("subcategories", []), **options)
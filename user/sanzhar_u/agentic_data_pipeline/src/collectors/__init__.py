@@ -1,5 +1,6 @@
 from .base_collector import BaseCollector
+from .catalog import ImageCatalog
 from .image_collector import ImageCollector
 
-__all__ = ["BaseCollector", "ImageCollector"]
+__all__ = ["BaseCollector", "ImageCatalog", "ImageCollector"]
 
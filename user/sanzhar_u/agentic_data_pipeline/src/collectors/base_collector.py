@@ -1,9 +1,38 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 
 
 class BaseCollector(ABC):
     @abstractmethod
-    def collect(self, keyword: str, output_path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    def collect(
+        self,
+        keyword: str,
+        output_path: str,
+        config: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Collect items for `keyword`; `metadata` (category, subcategory, ...) is attached to the catalogued items."""
         pass
-
+    
+    def start_collect(
+        self,
+        keyword: str,
+        output_path: str,
+        config: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Callable[[], Dict[str, Any]]:
+        """
+        Start collecting `keyword` and return a function that waits for the rest and returns
+        what `collect` would. Collectors that need a scarce resource (a browser) for only part
+        of the work return as soon as it is released; by default everything runs here.
+        """
+        result = self.collect(keyword, output_path, config, metadata)
+        return lambda: result
+    
+    def close(self):
+        """Release long-lived resources (browsers, sessions). Safe to call more than once."""
+        pass
+    
+    def is_complete(self, keyword: str, output_path: str, config: Dict[str, Any]) -> bool:
+        """Whether an earlier run already collected enough for `keyword`, so it can be skipped."""
+        return False
@@ -0,0 +1,48 @@
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCatalog:
+    """
+    Append-only JSONL catalog of every image saved during a run.
+
+    One record per line (path, keyword, category, subcategory, dimensions, hash), shared
+    by all collection workers, so downstream tools can scan or filter the whole
+    collection from a single file. Records are flushed as they are written and a
+    rerun keeps appending to the same file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Catalog is closed.")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def read(path: str) -> Iterator[Dict[str, Any]]:
+        """Yield catalog records, skipping a truncated last line left by an interrupted run."""
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed catalog line in %s", path)
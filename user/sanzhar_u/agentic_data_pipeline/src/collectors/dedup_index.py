@@ -0,0 +1,132 @@
+import os
+import logging
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 grayscale thumbnail."""
+    # Lets JPEG decode at reduced scale, which is most of the hashing cost; a no-op for other formats
+    image.draft("L", (hash_size * 8, hash_size * 8))
+    pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR).getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class PerceptualHashIndex:
+    """
+    Thread-safe near-duplicate index over 64-bit perceptual hashes.
+
+    Hashes live in a compact `array('Q')` and are looked up with multi-index hashing:
+    each hash is split into `radius + 1` disjoint bit chunks, and by the pigeonhole
+    principle any hash within `radius` bits shares at least one chunk exactly, so a
+    lookup only compares against the few hashes in matching chunk buckets. Each bucket
+    holds its hash positions in an `array('I')`.
+
+    A new image is first `reserve()`d, which blocks near-duplicates while it is being
+    written, and then either `commit()`ed once it is on disk or `release()`d if the
+    write failed. With `path` set, committed hashes are loaded from and appended to a
+    binary file, so the index persists across runs.
+    """
+
+    def __init__(self, radius: int = 4, path: Optional[str] = None):
+        self.radius = radius
+        self.path = path
+        self._hashes = array("Q")
+        self._lock = threading.Lock()
+
+        n_chunks = radius + 1
+        widths = [HASH_BITS // n_chunks + (1 if i < HASH_BITS % n_chunks else 0) for i in range(n_chunks)]
+        self._chunks = []
+        shift = HASH_BITS
+        for width in widths:
+            shift -= width
+            self._chunks.append((shift, (1 << width) - 1))
+        self._tables: List[Dict[int, array]] = [{} for _ in self._chunks]
+        # Reserved hashes of images still being written; only a handful at a time
+        self._pending: List[int] = []
+
+        self._file = None
+        if path:
+            self._load(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "ab")
+
+    def _load(self, path: str):
+        if not os.path.exists(path):
+            return
+        stored = array("Q")
+        with open(path, "rb") as f:
+            data = f.read()
+        # Drop a partially written trailing record, if any
+        stored.frombytes(data[:len(data) - len(data) % stored.itemsize])
+        for value in stored:
+            self._insert(value)
+        logger.info("Loaded %d perceptual hashes from %s", len(stored), path)
+
+    def _insert(self, value: int):
+        position = len(self._hashes)
+        self._hashes.append(value)
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            bucket = table.get((value >> shift) & mask)
+            if bucket is None:
+                bucket = table[(value >> shift) & mask] = array("I")
+            bucket.append(position)
+
+    def _find(self, value: int) -> Optional[int]:
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            for position in table.get((value >> shift) & mask, ()):
+                stored = self._hashes[position]
+                if (stored ^ value).bit_count() <= self.radius:
+                    return stored
+        for stored in self._pending:
+            if (stored ^ value).bit_count() <= self.radius:
+                return stored
+        return None
+
+    def find(self, value: int) -> Optional[int]:
+        """Return a stored hash within `radius` bits of `value`, if there is one."""
+        with self._lock:
+            return self._find(value)
+
+    def reserve(self, value: int) -> bool:
+        """Atomically reserve `value` unless a near-duplicate is indexed or reserved; True if reserved."""
+        with self._lock:
+            if self._find(value) is not None:
+                return False
+            self._pending.append(value)
+            return True
+
+    def commit(self, value: int):
+        """Index a reserved hash for good, persisting it when the index has a file."""
+        with self._lock:
+            self._pending.remove(value)
+            self._insert(value)
+            if self._file:
+                self._file.write(array("Q", [value]).tobytes())
+                self._file.flush()
+
+    def release(self, value: int):
+        """Drop a reservation whose image was never written."""
+        with self._lock:
+            self._pending.remove(value)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
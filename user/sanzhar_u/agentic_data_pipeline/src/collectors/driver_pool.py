@@ -0,0 +1,86 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
+
+from selenium import webdriver
+
+from ..core.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+
+class WebDriverPool:
+    """
+    Fixed-size pool of long-lived WebDriver sessions shared by collection workers.
+    
+    Drivers are created lazily, handed out one worker at a time, and recycled after
+    `max_uses` keywords or as soon as a health check shows the browser has crashed.
+    """
+    
+    def __init__(self, factory: Callable[[], webdriver.Chrome], size: int = 2, max_uses: int = 25):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[webdriver.Chrome, int]] = []
+        self._busy: List[webdriver.Chrome] = []
+        self._closed = False
+        atexit.register(self.close)
+    
+    @staticmethod
+    def _is_alive(driver: webdriver.Chrome) -> bool:
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _quit(driver: webdriver.Chrome):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug("Error quitting web-driver: %s", e)
+    
+    @contextmanager
+    def session(self) -> Iterator[webdriver.Chrome]:
+        # Time spent queueing for a free browser, separate from launching one
+        with get_tracer().span("scraper.driver_wait"):
+            self._slots.acquire()
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("WebDriverPool is closed")
+                driver, uses = self._idle.pop() if self._idle else (None, 0)
+            if driver is None:
+                logger.info("Launching a new pooled web-driver")
+                driver = self.factory()
+            with self._lock:
+                self._busy.append(driver)
+            
+            try:
+                yield driver
+            finally:
+                uses += 1
+                with self._lock:
+                    self._busy.remove(driver)
+                    keep = not self._closed and uses < self.max_uses and self._is_alive(driver)
+                    if keep:
+                        self._idle.append((driver, uses))
+                if not keep:
+                    logger.info("Recycling web-driver after %d uses", uses)
+                    self._quit(driver)
+        finally:
+            self._slots.release()
+    
+    def close(self):
+        with self._lock:
+            self._closed = True
+            drivers = [driver for driver, _ in self._idle] + list(self._busy)
+            self._idle.clear()
+            self._busy.clear()
+        for driver in drivers:
+            self._quit(driver)
@@ -1,21 +1,96 @@
 import os
-import io
-import time
 import json
+import time
 import logging
-import requests
-from typing import List, Tuple, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional
 
-from PIL import Image
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from ..core.tracing import get_tracer
+from .catalog import ImageCatalog
+from .dedup_index import PerceptualHashIndex
+from .driver_pool import WebDriverPool
+from .image_downloader import DownloadLoop, ImageDownloader
+
 logger = logging.getLogger(__name__)
 
+# Each script below replaces a series of per-element WebDriver round-trips with one call
+_THUMBNAIL_CENSUS_JS = """
+const minWidth = arguments[0];
+const found = [];
+const images = document.getElementsByTagName('img');
+let next = window.__censusNext || 0;
+for (let i = 0; i < images.length; i++) {
+    const img = images[i];
+    if (img.src && img.naturalWidth >= minWidth) {
+        // Tagged once: positions in the live list shift as previews and scrolling add images
+        if (img.dataset.censusIdx === undefined) img.dataset.censusIdx = next++;
+        found.push([img.src, img.naturalWidth, Number(img.dataset.censusIdx)]);
+    }
+}
+window.__censusNext = next;
+return found;
+"""
+_SCROLL_PAGE_JS = """
+window.scrollBy(0, window.innerHeight);
+return window.scrollY + window.innerHeight >= document.documentElement.scrollHeight;
+"""
+_IMAGES_LOADED_JS = """
+return Array.from(document.images)
+    .filter(img => img.getBoundingClientRect().top < window.innerHeight)
+    .every(img => img.complete);
+"""
+_CLICK_THUMBNAIL_JS = """
+const img = document.querySelector('img[data-census-idx="' + arguments[0] + '"]');
+if (!img) return false;
+img.scrollIntoView({block: 'center'});
+img.click();
+return true;
+"""
+_PREVIEW_IMAGES_JS = """
+return Array.from(document.querySelectorAll('img.iPVvYb'))
+    .map(img => [img.src, img.naturalWidth, img.outerHTML]);
+"""
+
+
+def create_chrome_driver(webdriver_path: str, headless: bool = True) -> webdriver.Chrome:
+    with get_tracer().span("scraper.driver_launch"):
+        try:
+            options = Options()
+            options.add_argument('--no-sandbox')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_experimental_option("excludeSwitches", ["enable-logging"])
+            if headless:
+                options.add_argument('--headless')
+        
+            service = Service(executable_path=webdriver_path)
+            driver = webdriver.Chrome(service=service, options=options)
+            driver.set_window_size(1400, 1050)
+            driver.get("https://www.google.com")
+        
+            try:
+                WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.ID, "W0wltc"))
+                ).click()
+            except Exception:
+                pass
+        
+            return driver
+        except Exception as e:
+            logger.error("Error launching web-driver: %s", e)
+            raise RuntimeError(
+                "It seems your chromedriver version doesn't fit your Google Chrome. "
+                "Install correct: https://chromedriver.chromium.org/downloads"
+            ) from e
+
 
 class GoogleImageScraper:
     def __init__(
@@ -27,7 +102,13 @@ class GoogleImageScraper:
         headless: bool = True,
         min_resolution: Tuple[int, int] = (0, 0),
         max_resolution: Tuple[int, int] = (1920, 1080),
-        max_missed: int = 10
+        max_missed: int = 10,
+        driver_pool: Optional[WebDriverPool] = None,
+        download_concurrency: int = 8,
+        dedup_index: Optional[PerceptualHashIndex] = None,
+        catalog: Optional[ImageCatalog] = None,
+        catalog_fields: Optional[Dict[str, Any]] = None,
+        download_loop: Optional[DownloadLoop] = None
     ):
         self.search_key = search_key
         self.number_of_images = number_of_images
@@ -38,6 +119,14 @@ class GoogleImageScraper:
         self.max_resolution = max_resolution
         self.max_missed = max_missed
         self.metadata = []
+        self._metadata_by_url: Dict[str, Dict[str, Any]] = {}
+        self._metadata_lock = threading.Lock()
+        self.driver_pool = driver_pool
+        self.download_concurrency = download_concurrency
+        self.dedup_index = dedup_index
+        self.catalog = catalog
+        self.catalog_fields = catalog_fields or {}
+        self.download_loop = download_loop
         self.driver: Optional[webdriver.Chrome] = None
         
         if not isinstance(number_of_images, int):
@@ -48,164 +137,167 @@ class GoogleImageScraper:
             os.makedirs(self.image_path, exist_ok=True)
     
     def _initialize_driver(self) -> webdriver.Chrome:
+        return create_chrome_driver(self.webdriver_path, self.headless)
+    
+    @contextmanager
+    def _driver_session(self) -> Iterator[webdriver.Chrome]:
+        """Borrow a browser from the pool when there is one, otherwise launch and quit a private one."""
+        if self.driver_pool is not None:
+            with self.driver_pool.session() as driver:
+                yield driver
+            return
+        
+        driver = self._initialize_driver()
         try:
-            options = Options()
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_experimental_option("excludeSwitches", ["enable-logging"])
-            if self.headless:
-                options.add_argument('--headless')
-            
-            service = Service(executable_path=self.webdriver_path)
-            driver = webdriver.Chrome(service=service, options=options)
-            driver.set_window_size(1400, 1050)
-            driver.get("https://www.google.com")
-            
+            yield driver
+        finally:
+            driver.quit()
+    
+    def _create_downloader(self) -> ImageDownloader:
+        return ImageDownloader(
+            image_path=self.image_path,
+            search_key=self.search_key,
+            min_resolution=self.min_resolution,
+            max_resolution=self.max_resolution,
+            concurrency=self.download_concurrency,
+            dedup_index=self.dedup_index,
+            on_saved=self._record_saved,
+            download_loop=self.download_loop
+        )
+    
+    def _add_metadata(self, image_url: str, html: str):
+        with self._metadata_lock:
+            entry = {"id": len(self.metadata), "url": image_url, "html": html}
+            self.metadata.append(entry)
+            self._metadata_by_url[image_url] = entry
+    
+    def _record_saved(self, image_url: str, filename: str, path: str, info: Dict[str, Any]):
+        with self._metadata_lock:
+            entry = self._metadata_by_url.get(image_url)
+            if entry is not None:
+                entry["filename"] = filename
+                entry["filepath"] = path
+        
+        if self.catalog is not None:
+            self.catalog.append({
+                "keyword": self.search_key,
+                **self.catalog_fields,
+                "url": image_url,
+                "filename": filename,
+                "path": path,
+                **info
+            })
+    
+    def _wait_for_images(self, timeout: float = 1):
+        """Wait until the images in or above the viewport have loaded, at most `timeout` seconds."""
+        if timeout <= 0:
+            return
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script(_IMAGES_LOADED_JS)
+            )
+        except TimeoutException:
+            pass
+    
+    def _thumbnail_census(
+        self,
+        wanted: int,
+        min_width: int = 80,
+        max_scrolls: int = 20,
+        max_wait: float = 5
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Return (src, naturalWidth, census id) for every loaded thumbnail, scrolling a page
+        at a time until `wanted` are available or the results stop growing. Waiting for
+        images to load takes at most `max_wait` seconds in total.
+        """
+        deadline = time.monotonic() + max_wait
+        self._wait_for_images(min(1, deadline - time.monotonic()))
+        thumbnails = self.driver.execute_script(_THUMBNAIL_CENSUS_JS, min_width)
+        for _ in range(max_scrolls):
+            if len(thumbnails) >= wanted:
+                break
+            at_bottom = self.driver.execute_script(_SCROLL_PAGE_JS)
+            self._wait_for_images(min(1, deadline - time.monotonic()))
+            previous = len(thumbnails)
+            thumbnails = self.driver.execute_script(_THUMBNAIL_CENSUS_JS, min_width)
+            if at_bottom and len(thumbnails) == previous:
+                break
+        return thumbnails
+    
+    def _open_preview(self, census_id: int) -> Optional[List[Tuple[str, int, str]]]:
+        """Click a thumbnail and return (src, naturalWidth, outerHTML) of the preview images, or None if the click failed."""
+        with get_tracer().span("scraper.click"):
             try:
-                WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.ID, "W0wltc"))
-                ).click()
+                clicked = self.driver.execute_script(_CLICK_THUMBNAIL_JS, census_id)
             except Exception:
-                pass
-            
-            return driver
-        except Exception as e:
-            logger.error("Error launching web-driver: %s", e)
-            raise RuntimeError(
-                "It seems your chromedriver version doesn't fit your Google Chrome. "
-                "Install correct: https://chromedriver.chromium.org/downloads"
-            ) from e
+                clicked = False
+            if not clicked:
+                return None
+            WebDriverWait(self.driver, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "img.iPVvYb"))
+            )
+            return self.driver.execute_script(_PREVIEW_IMAGES_JS)
     
-    def find_image_urls(self) -> List[str]:
+    def find_image_urls(self, on_url: Optional[Callable[[int, str], None]] = None) -> List[str]:
+        """
+        Collect full-size image URLs for the search key. `on_url(index, url)` is called
+        as soon as each URL is found so a download stage can start on it immediately.
+        """
         if self.driver is None:
             self.driver = self._initialize_driver()
         
+        tracer = get_tracer()
         logger.info("Searching images for: %s", self.search_key)
         url = f"https://www.google.com/search?q={self.search_key}&source=lnms&tbm=isch"
-        self.driver.get(url)
-        
-        WebDriverWait(self.driver, 10).until(
-            lambda d: len(d.find_elements(By.TAG_NAME, "img")) > 10
-        )
-        
-        raw_thumbnails = self.driver.find_elements(By.TAG_NAME, "img")
-        logger.debug("Number of thumbnails found: %d", len(raw_thumbnails))
-        
-        thumbnails = []
-        for thumb in raw_thumbnails:
-            try:
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", thumb)
-                time.sleep(0.1)
-                width = self.driver.execute_script(
-                    "return arguments[0].naturalWidth;",
-                    thumb
-                )
-                src = thumb.get_attribute("src")
-                if src and width and width >= 80:
-                    thumbnails.append(thumb)
-            except Exception:
-                continue
+        with tracer.span("scraper.search_page"):
+            self.driver.get(url)
+            WebDriverWait(self.driver, 10).until(
+                lambda d: len(d.find_elements(By.TAG_NAME, "img")) > 10
+            )
         
+        with tracer.span("scraper.thumbnail_census"):
+            thumbnails = self._thumbnail_census(self.number_of_images)
         logger.info("Number of valid thumbnails: %d", len(thumbnails))
         
         image_urls = set()
         missed_count = 0
         
-        for index, thumbnail in enumerate(thumbnails):
+        for src, width, position in thumbnails:
             if len(image_urls) >= self.number_of_images:
                 break
             
             try:
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", thumbnail)
-                time.sleep(0.1)
-                try:
-                    thumbnail.click()
-                    logger.debug("Click on preview #%d", index + 1)
-                except Exception:
+                previews = self._open_preview(position)
+                if previews is None:
                     missed_count += 1
                     if missed_count > self.max_missed:
                         logger.critical("Too many clicks without positive result.")
                         break
                     continue
+                logger.debug("Click on preview #%d (%dpx thumbnail)", position + 1, width)
                 
-                WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "img.iPVvYb"))
-                )
-                images = self.driver.find_elements(By.CSS_SELECTOR, "img.iPVvYb")
-                
-                for img in images:
-                    full_src = img.get_attribute("src")
-                    natural_width = self.driver.execute_script(
-                        "return arguments[0].naturalWidth",
-                        img
-                    )
+                for full_src, natural_width, outer_html in previews:
                     if full_src and full_src.startswith("http") and natural_width > 300:
                         if full_src not in image_urls:
                             image_urls.add(full_src)
-                            outer_html = img.get_attribute("outerHTML")
-                            self.metadata.append({
-                                "id": len(self.metadata),
-                                "url": full_src,
-                                "html": outer_html
-                            })
+                            self._add_metadata(full_src, outer_html)
                             logger.info("[+] Saving: %s", full_src)
+                            if on_url:
+                                on_url(len(image_urls) - 1, full_src)
                         break
             
             except Exception as e:
-                logger.error("A thumbnail error #%d: %s", index + 1, e)
+                logger.error("A thumbnail error #%d: %s", position + 1, e)
                 continue
         
         logger.info("Total URLs gathered: %d", len(image_urls))
         return list(image_urls)
     
-    def save_images(self, image_urls: List[str]) -> dict:
-        logger.info("Saving %d images...", len(image_urls))
-        
-        saved_count = 0
-        skipped_count = 0
-        
-        for indx, image_url in enumerate(image_urls):
-            try:
-                response = requests.get(image_url, timeout=5)
-                if response.status_code == 200:
-                    with Image.open(io.BytesIO(response.content)) as img:
-                        filename = f"{self.search_key}{indx}.{img.format.lower()}"
-                        path = os.path.join(self.image_path, filename)
-                        
-                        if (img.size[0] < self.min_resolution[0] or
-                                img.size[1] < self.min_resolution[1] or
-                                img.size[0] > self.max_resolution[0] or
-                                img.size[1] > self.max_resolution[1]):
-                            logger.warning(
-                                "Image %s does not fit size constraints %s -> SKIPPED...",
-                                filename,
-                                img.size
-                            )
-                            skipped_count += 1
-                            continue
-                        
-                        try:
-                            img.save(path)
-                        except OSError:
-                            img.convert("RGB").save(path)
-                        
-                        logger.info("Saved: %s", path)
-                        saved_count += 1
-                        
-                        # Update metadata
-                        for m in self.metadata:
-                            if m["url"] == image_url:
-                                m["filename"] = filename
-                                m["filepath"] = path
-                                break
-                else:
-                    logger.error("Wrong status-code: %s", response.status_code)
-                    skipped_count += 1
-            
-            except Exception as e:
-                logger.error("Error saving image %d: %s", indx + 1, e)
-                skipped_count += 1
-        
+    def _write_metadata(self):
+        # With a run-wide catalog the per-keyword file would only duplicate it
+        if self.catalog is not None:
+            return
         metadata_path = os.path.join(self.image_path, "metadata.json")
         try:
             with open(metadata_path, "w", encoding="utf-8") as f:
@@ -213,33 +305,63 @@ class GoogleImageScraper:
             logger.info("Metadata saved to: %s", metadata_path)
         except Exception as e:
             logger.error("Error writing metadata.json: %s", e)
+    
+    def save_images(self, image_urls: List[str]) -> dict:
+        logger.info("Saving %d images...", len(image_urls))
+        
+        downloader = self._create_downloader().start()
+        for indx, image_url in enumerate(image_urls):
+            downloader.submit(indx, image_url)
+        stats = downloader.close()
         
-        logger.info("Download completed.")
-        return {
-            "saved": saved_count,
-            "skipped": skipped_count,
-            "total": len(image_urls)
-        }
+        self._write_metadata()
+        return stats
     
-    def scrape(self) -> dict:
+    def start_scrape(self) -> Callable[[], dict]:
+        """
+        Discover URLs and download them as a two-stage pipeline: every URL found by the
+        browser goes straight to the downloader's queue, and the browser session is
+        released as soon as discovery ends. Returns a function that waits for the
+        remaining downloads and returns the scrape result, so the caller can hand the
+        browser on before they finish.
+        """
+        downloader = self._create_downloader().start()
         try:
-            image_urls = self.find_image_urls()
-            stats = self.save_images(image_urls)
-            return {
-                "success": True,
-                "keyword": self.search_key,
-                "urls_found": len(image_urls),
-                **stats
-            }
+            with self._driver_session() as driver:
+                self.driver = driver
+                image_urls = self.find_image_urls(on_url=downloader.submit)
         except Exception as e:
             logger.error("Error during scraping: %s", e)
-            return {
+            downloader.close()
+            failure = {
                 "success": False,
                 "keyword": self.search_key,
                 "error": str(e)
             }
+            return lambda: failure
         finally:
-            if self.driver:
-                self.driver.quit()
-                self.driver = None
-
+            self.driver = None
+        
+        def finish() -> dict:
+            try:
+                stats = downloader.close()
+                self._write_metadata()
+            except Exception as e:
+                logger.error("Error during scraping: %s", e)
+                return {
+                    "success": False,
+                    "keyword": self.search_key,
+                    "error": str(e)
+                }
+            return {
+                "success": True,
+                "keyword": self.search_key,
+                "urls_found": len(image_urls),
+                **stats
+            }
+        
+        return finish
+    
+    def scrape(self) -> dict:
+        """Discover and download in one call; see `start_scrape`."""
+        return self.start_scrape()()
@@ -1,17 +1,99 @@
 import os
 import logging
-from typing import Dict, Any
+import threading
+from functools import partial
+from typing import Callable, Dict, Any, Optional
 
 from .base_collector import BaseCollector
+from .catalog import ImageCatalog
+from .dedup_index import PerceptualHashIndex
+from .driver_pool import WebDriverPool
+from .image_downloader import DownloadLoop
 
-from .google_image_scraper import GoogleImageScraper
+from .google_image_scraper import GoogleImageScraper, create_chrome_driver
 
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff", ".mpo")
+
 
 class ImageCollector(BaseCollector):
     
-    def collect(self, keyword: str, output_path: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(self):
+        self._pool: Optional[WebDriverPool] = None
+        self._dedup_index: Optional[PerceptualHashIndex] = None
+        self._catalog: Optional[ImageCatalog] = None
+        self._download_loop: Optional[DownloadLoop] = None
+        self._pool_lock = threading.Lock()
+    
+    def _get_pool(self, config: Dict[str, Any]) -> WebDriverPool:
+        # Created on first use because the driver settings only arrive with the collection config
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = WebDriverPool(
+                    factory=partial(create_chrome_driver, config["webdriver_path"], config.get("headless", True)),
+                    size=config.get("browser_pool_size", 2),
+                    max_uses=config.get("driver_max_uses", 25)
+                )
+            return self._pool
+    
+    def _get_dedup_index(self, config: Dict[str, Any]) -> Optional[PerceptualHashIndex]:
+        # One index for every keyword and worker of the run, persisted next to the data
+        if not config.get("dedup_images", True):
+            return None
+        with self._pool_lock:
+            if self._dedup_index is None:
+                self._dedup_index = PerceptualHashIndex(
+                    radius=config.get("phash_radius", 4),
+                    path=config.get("phash_index_path") or os.path.join(
+                        config.get("data_path", "./data"), "phash_index.bin"
+                    )
+                )
+            return self._dedup_index
+    
+    def _get_catalog(self, config: Dict[str, Any]) -> ImageCatalog:
+        with self._pool_lock:
+            if self._catalog is None:
+                self._catalog = ImageCatalog(
+                    config.get("catalog_path") or os.path.join(config.get("data_path", "./data"), "catalog.jsonl")
+                )
+            return self._catalog
+    
+    def _get_download_loop(self, config: Dict[str, Any]) -> DownloadLoop:
+        # One client and set of per-host limits for every keyword's downloads
+        with self._pool_lock:
+            if self._download_loop is None:
+                self._download_loop = DownloadLoop(
+                    clients=config.get("browser_pool_size", 2),
+                    connections_per_client=config.get("download_concurrency", 8)
+                ).start()
+            return self._download_loop
+    
+    def is_complete(self, keyword: str, output_path: str, config: Dict[str, Any]) -> bool:
+        keyword_path = os.path.join(output_path, keyword)
+        if not os.path.isdir(keyword_path):
+            return False
+        with os.scandir(keyword_path) as entries:
+            existing = sum(1 for entry in entries if entry.name.lower().endswith(IMAGE_EXTENSIONS))
+        return existing >= config.get("number_of_images", 30)
+    
+    def collect(
+        self,
+        keyword: str,
+        output_path: str,
+        config: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return self.start_collect(keyword, output_path, config, metadata)()
+    
+    def start_collect(
+        self,
+        keyword: str,
+        output_path: str,
+        config: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Callable[[], Dict[str, Any]]:
+        """Search with a pooled browser and return once it is released; the returned function waits for the downloads."""
         try:
             os.makedirs(output_path, exist_ok=True)
             
@@ -23,11 +105,30 @@ class ImageCollector(BaseCollector):
                 headless=config.get("headless", True),
                 min_resolution=config.get("min_resolution", (400, 400)),
                 max_resolution=config.get("max_resolution", (8000, 8000)),
-                max_missed=config.get("max_missed", 200)
+                max_missed=config.get("max_missed", 200),
+                driver_pool=self._get_pool(config),
+                download_concurrency=config.get("download_concurrency", 8),
+                dedup_index=self._get_dedup_index(config),
+                catalog=self._get_catalog(config),
+                catalog_fields=metadata,
+                download_loop=self._get_download_loop(config)
             )
             
-            result = scraper.scrape()
-            
+            finish_scrape = scraper.start_scrape()
+        
+        except Exception as e:
+            logger.error("Error collecting images for keyword '%s': %s", keyword, e)
+            failure = {
+                "success": False,
+                "keyword": keyword,
+                "error": str(e),
+                "items_collected": 0,
+                "output_path": output_path
+            }
+            return lambda: failure
+        
+        def finish() -> Dict[str, Any]:
+            result = finish_scrape()
             if result.get("success"):
                 return {
                     "success": True,
@@ -35,7 +136,8 @@ class ImageCollector(BaseCollector):
                     "items_collected": result.get("saved", 0),
                     "output_path": os.path.join(output_path, keyword),
                     "urls_found": result.get("urls_found", 0),
-                    "skipped": result.get("skipped", 0)
+                    "skipped": result.get("skipped", 0),
+                    "duplicates": result.get("duplicates", 0)
                 }
             else:
                 return {
@@ -46,13 +148,19 @@ class ImageCollector(BaseCollector):
                     "output_path": output_path
                 }
         
-        except Exception as e:
-            logger.error("Error collecting images for keyword '%s': %s", keyword, e)
-            return {
-                "success": False,
-                "keyword": keyword,
-                "error": str(e),
-                "items_collected": 0,
-                "output_path": output_path
-            }
-
+        return finish
+    
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+            if self._dedup_index is not None:
+                self._dedup_index.close()
+                self._dedup_index = None
+            if self._download_loop is not None:
+                self._download_loop.close()
+                self._download_loop = None
+            if self._catalog is not None:
+                self._catalog.close()
+                self._catalog = None
@@ -0,0 +1,287 @@
+import os
+import io
+import asyncio
+import logging
+import itertools
+import contextlib
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from PIL import Image
+
+from ..core.tracing import get_tracer
+from .dedup_index import PerceptualHashIndex, dhash
+
+logger = logging.getLogger(__name__)
+
+# Dimensions of common formats sit in the first few KB; give up on prefiltering past this
+_MAX_PROBE_BYTES = 256 * 1024
+# The header is probed when the buffer first reaches this size and then each time it doubles
+_FIRST_PROBE_BYTES = 1024
+
+
+class DownloadLoop:
+    """
+    Event loop on its own thread with pooled async HTTP clients, shared by the
+    downloaders of every keyword so that connections, and the per-host limits that
+    keep the scraper polite to each site, span the whole run instead of being set
+    up again per keyword.
+
+    Connections are split over `clients` clients of `connections_per_client` each,
+    handed out round-robin to downloaders; a client's pool rescans every open
+    connection for every queued request, so one large pool costs more loop time
+    than the transfers themselves. `per_host_limit` requests run against any one
+    host at a time across all clients.
+    """
+
+    def __init__(self, clients: int = 1, connections_per_client: int = 8, per_host_limit: int = 4, timeout: float = 5):
+        self.clients = max(1, clients)
+        self.connections_per_client = max(1, connections_per_client)
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout = timeout
+        # (client, slots) pairs; requests beyond a client's connections wait on its
+        # slots rather than in the client's queue
+        self._clients: List[Tuple[httpx.AsyncClient, asyncio.Semaphore]] = []
+        self._next_client = itertools.count()
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="download-loop", daemon=True)
+
+    def start(self) -> "DownloadLoop":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedule `coro` on the loop; safe to call from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def client(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        """Next client and its connection slots, round-robin; safe to call from any thread."""
+        return self._clients[next(self._next_client) % len(self._clients)]
+
+    def host_slots(self, host: str) -> asyncio.Semaphore:
+        # Only called from coroutines on the loop, so the map needs no lock
+        return self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+
+    def close(self):
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join()
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        limits = httpx.Limits(
+            max_connections=self.connections_per_client,
+            max_keepalive_connections=self.connections_per_client
+        )
+        async with contextlib.AsyncExitStack() as stack:
+            for _ in range(self.clients):
+                client = await stack.enter_async_context(
+                    httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True)
+                )
+                self._clients.append((client, asyncio.Semaphore(self.connections_per_client)))
+            self._ready.set()
+            await self._stop.wait()
+
+
+class ImageDownloader:
+    """
+    Download stage of the scraper for one keyword, running on a DownloadLoop.
+
+    URLs are pushed with `submit()` while the browser keeps discovering, so
+    downloads overlap with browsing and never hold a browser session; `close()`
+    waits for this keyword's downloads to finish and returns the download stats.
+
+    Downloads run on the shared `download_loop` when one is given, at most
+    `concurrency` at a time for this keyword; without one the downloader starts a
+    private loop and closes it again in `close()`. Each body is streamed and only
+    read far enough to parse the image header; images outside the resolution limits
+    are aborted there, before the rest of the body is transferred or anything is decoded.
+
+    With a shared `dedup_index`, accepted images are perceptually hashed and
+    near-duplicates of anything already collected (by any worker or earlier run)
+    are dropped before they are written.
+
+    `on_saved(url, filename, path, info)` is called for every written image, with
+    `info` holding its format, width, height, size in bytes and perceptual hash.
+    """
+
+    def __init__(
+        self,
+        image_path: str,
+        search_key: str,
+        min_resolution: Tuple[int, int] = (0, 0),
+        max_resolution: Tuple[int, int] = (1920, 1080),
+        concurrency: int = 8,
+        per_host_limit: int = 4,
+        timeout: float = 5,
+        dedup_index: Optional[PerceptualHashIndex] = None,
+        on_saved: Optional[Callable[[str, str, str, Dict[str, Any]], None]] = None,
+        download_loop: Optional[DownloadLoop] = None
+    ):
+        self.image_path = image_path
+        self.search_key = search_key
+        self.min_resolution = min_resolution
+        self.max_resolution = max_resolution
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout = timeout
+        self.dedup_index = dedup_index
+        self.on_saved = on_saved
+        self.stats = {"saved": 0, "skipped": 0, "duplicates": 0, "total": 0, "bytes": 0}
+        self._download_loop = download_loop
+        self._owns_loop = download_loop is None
+        # Created on the loop by the first download, as asyncio primitives belong to one loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_slots: Optional[asyncio.Semaphore] = None
+        self._futures: List[Future] = []
+
+    def start(self) -> "ImageDownloader":
+        if self._download_loop is None:
+            self._download_loop = DownloadLoop(
+                connections_per_client=self.concurrency,
+                per_host_limit=self.per_host_limit,
+                timeout=self.timeout
+            ).start()
+        self._client, self._client_slots = self._download_loop.client()
+        return self
+
+    def submit(self, index: int, image_url: str):
+        """Queue a URL for download; called from the thread that drives discovery."""
+        self.stats["total"] += 1
+        self._futures.append(self._download_loop.run(self._fetch(index, image_url)))
+
+    def close(self) -> dict:
+        futures, self._futures = self._futures, []
+        wait(futures)
+        if self._owns_loop and self._download_loop is not None:
+            self._download_loop.close()
+            self._download_loop = None
+        logger.info("Download completed.")
+        return dict(self.stats)
+
+    async def _fetch(self, index: int, image_url: str):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        host = urlsplit(image_url).netloc
+        try:
+            async with self._slots, self._download_loop.host_slots(host), self._client_slots:
+                with get_tracer().span("download.image", host=host):
+                    outcome = await self._download(index, image_url)
+        except Exception as e:
+            logger.error("Error saving image %d: %s", index + 1, e)
+            outcome = "skipped"
+        self.stats[outcome] += 1
+
+    def _fits(self, size: Tuple[int, int]) -> bool:
+        return not (size[0] < self.min_resolution[0] or
+                    size[1] < self.min_resolution[1] or
+                    size[0] > self.max_resolution[0] or
+                    size[1] > self.max_resolution[1])
+
+    @staticmethod
+    def _probe(data: bytes) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """Return (format, size) once `data` holds a complete image header, else None."""
+        try:
+            # Image.open only parses the header; pixel data is not decoded here
+            with Image.open(io.BytesIO(data)) as img:
+                return img.format, img.size
+        except Exception:
+            return None
+
+    @staticmethod
+    def _hash(data: bytes) -> int:
+        with Image.open(io.BytesIO(data)) as img:
+            return dhash(img)
+
+    async def _download(self, index: int, image_url: str) -> str:
+        """Fetch one image and return the stats bucket it lands in: saved, skipped or duplicates."""
+        async with self._client.stream("GET", image_url) as response:
+            if response.status_code != 200:
+                logger.error("Wrong status-code: %s", response.status_code)
+                return "skipped"
+
+            buffer = bytearray()
+            header = None
+            next_probe = _FIRST_PROBE_BYTES
+            async for chunk in response.aiter_bytes():
+                buffer.extend(chunk)
+                # Each probe copies and parses the buffer, so probing every chunk would be quadratic
+                if header is None and next_probe <= _MAX_PROBE_BYTES and len(buffer) >= next_probe:
+                    next_probe = 2 * len(buffer)
+                    header = self._probe(bytes(buffer))
+                    if header and not self._fits(header[1]):
+                        self.stats["bytes"] += len(buffer)
+                        logger.warning(
+                            "Image %s%d does not fit size constraints %s -> SKIPPED...",
+                            self.search_key,
+                            index,
+                            header[1]
+                        )
+                        # Leaving the stream context here closes the connection without reading the rest
+                        return "skipped"
+            self.stats["bytes"] += len(buffer)
+
+        if header is None:
+            with get_tracer().span("download.decode_header"):
+                header = self._probe(bytes(buffer))
+            if header is None:
+                logger.error("Unrecognised image data for %s", image_url)
+                return "skipped"
+            if not self._fits(header[1]):
+                logger.warning(
+                    "Image %s%d does not fit size constraints %s -> SKIPPED...",
+                    self.search_key,
+                    index,
+                    header[1]
+                )
+                return "skipped"
+
+        phash = None
+        if self.dedup_index is not None:
+            with get_tracer().span("download.decode_hash"):
+                phash = await asyncio.to_thread(self._hash, bytes(buffer))
+            if not self.dedup_index.reserve(phash):
+                logger.info("Near-duplicate of an already collected image -> SKIPPED: %s", image_url)
+                return "duplicates"
+
+        filename = f"{self.search_key}{index}.{header[0].lower()}"
+        path = os.path.join(self.image_path, filename)
+        # The original bytes are written as-is, so accepted images are never decoded or re-encoded
+        try:
+            with get_tracer().span("download.write"):
+                await asyncio.to_thread(self._write, path, bytes(buffer))
+        except BaseException:
+            # Cancellation included: an image that never reached disk must not count as seen
+            if phash is not None:
+                self.dedup_index.release(phash)
+            raise
+        if phash is not None:
+            self.dedup_index.commit(phash)
+
+        logger.info("Saved: %s", path)
+        if self.on_saved:
+            self.on_saved(image_url, filename, path, {
+                "format": header[0],
+                "width": header[1][0],
+                "height": header[1][1],
+                "bytes": len(buffer),
+                "phash": f"{phash:016x}" if phash is not None else None
+            })
+        return "saved"
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        with open(path, "wb") as f:
+            f.write(data)
@@ -1,10 +1,13 @@
-import os
 import logging
+import threading
 from typing import Dict, Any, Optional
 from langchain_core.language_models import BaseChatModel
 
 from ..agents import CategoryAgent, SubcategoryAgent, KeywordAgent
 from ..collectors import BaseCollector
+from ..core.cache import StageCache
+from ..core.llm_cache import configure_llm_cache
+from ..core.concurrency import StagedExecutor, create_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -15,18 +18,57 @@ class PipelineConfig:
         llm: BaseChatModel,
         collector: BaseCollector,
         collection_config: Dict[str, Any],
+        max_concurrency: int = 8,
+        requests_per_minute: float = 40.0,
+        max_retries: int = 2,
+        cache_path: Optional[str] = None,
+        structured_output: bool = False,
+        keyword_batch_size: int = 1,
+        keyword_dedup: bool = False,
+        keyword_similarity: float = 0.8,
+        dedup_budget_factor: float = 2.0,
+        llm_cache_path: Optional[str] = None,
+        llm_cache_ttl: Optional[float] = None,
+        llm_cache_max_entries: Optional[int] = None,
         **kwargs
     ):
-        self.llm = llm
         self.collector = collector
         self.collection_config = collection_config
+        # Keyword jobs of the sequential collection loop, kept running across its graph steps
+        self.collection_executor = StagedExecutor(collection_config.get("browser_pool_size", 1))
+        self.max_concurrency = max_concurrency
+        # The same bound for every agent call in the process: fan-out branches each gather on
+        # their own event loop, so a per-gather limit alone would multiply by the branch count
+        self.call_slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.max_retries = max_retries
+        # Subcategories per keyword request; capped further by the model's output limit
+        self.keyword_batch_size = keyword_batch_size
+        # Near-duplicate keywords are collapsed before collection and their image budget moved to the kept one
+        self.keyword_dedup = keyword_dedup
+        self.keyword_similarity = keyword_similarity
+        self.dedup_budget_factor = dedup_budget_factor
+        # One limiter shared by every agent call so concurrent nodes respect the provider quota together.
+        # The model applies it after its LLM cache lookup, so cached answers never wait for a token.
+        self.rate_limiter = create_rate_limiter(requests_per_minute)
+        if llm.rate_limiter is None:
+            llm = llm.model_copy(update={"rate_limiter": self.rate_limiter})
+        else:
+            logger.info("The model has its own rate limiter; requests_per_minute is not applied")
+        self.llm = llm
+        # LLM stage outputs persist here so reruns only repeat what changed
+        self.stage_cache = StageCache(cache_path) if cache_path else None
+        # Identical prompts to the same model are answered from disk, across agents and runs
+        self.llm_cache = (
+            configure_llm_cache(llm_cache_path, ttl=llm_cache_ttl, max_entries=llm_cache_max_entries)
+            if llm_cache_path else None
+        )
         self.extra_config = kwargs
         
         # Initialize agents
         self.agents = {
-            "category_agent": CategoryAgent(llm),
-            "subcategory_agent": SubcategoryAgent(llm),
-            "keyword_agent": KeywordAgent(llm)
+            "category_agent": CategoryAgent(llm, structured_output),
+            "subcategory_agent": SubcategoryAgent(llm, structured_output),
+            "keyword_agent": KeywordAgent(llm, structured_output)
         }
     
     def to_dict(self) -> Dict[str, Any]:
@@ -34,6 +76,16 @@ class PipelineConfig:
             "agents": self.agents,
             "collector": self.collector,
             "collection_config": self.collection_config,
+            "collection_executor": self.collection_executor,
+            "max_concurrency": self.max_concurrency,
+            "call_slots": self.call_slots,
+            "max_retries": self.max_retries,
+            "keyword_batch_size": self.keyword_batch_size,
+            "keyword_dedup": self.keyword_dedup,
+            "keyword_similarity": self.keyword_similarity,
+            "dedup_budget_factor": self.dedup_budget_factor,
+            "rate_limiter": self.rate_limiter,
+            "stage_cache": self.stage_cache,
             **self.extra_config
         }
 
@@ -46,7 +98,25 @@ def create_image_collection_config(
     headless: bool = True,
     min_resolution: tuple = (400, 400),
     max_resolution: tuple = (8000, 8000),
-    max_missed: int = 200
+    max_missed: int = 200,
+    browser_pool_size: int = 2,
+    driver_max_uses: int = 25,
+    download_concurrency: int = 8,
+    dedup_images: bool = True,
+    phash_radius: int = 4,
+    skip_complete: bool = True,
+    max_concurrency: int = 8,
+    requests_per_minute: float = 40.0,
+    max_retries: int = 2,
+    cache_path: Optional[str] = None,
+    structured_output: bool = False,
+    keyword_batch_size: int = 8,
+    keyword_dedup: bool = True,
+    keyword_similarity: float = 0.8,
+    dedup_budget_factor: float = 2.0,
+    llm_cache_path: Optional[str] = None,
+    llm_cache_ttl: Optional[float] = None,
+    llm_cache_max_entries: Optional[int] = None
 ) -> PipelineConfig:
     from ..collectors import ImageCollector
     
@@ -59,12 +129,30 @@ def create_image_collection_config(
         "headless": headless,
         "min_resolution": min_resolution,
         "max_resolution": max_resolution,
-        "max_missed": max_missed
+        "max_missed": max_missed,
+        "browser_pool_size": browser_pool_size,
+        "driver_max_uses": driver_max_uses,
+        "download_concurrency": download_concurrency,
+        "dedup_images": dedup_images,
+        "phash_radius": phash_radius,
+        "skip_complete": skip_complete
     }
     
     return PipelineConfig(
         llm=llm,
         collector=collector,
-        collection_config=collection_config
+        collection_config=collection_config,
+        max_concurrency=max_concurrency,
+        requests_per_minute=requests_per_minute,
+        max_retries=max_retries,
+        cache_path=cache_path,
+        structured_output=structured_output,
+        keyword_batch_size=keyword_batch_size,
+        keyword_dedup=keyword_dedup,
+        keyword_similarity=keyword_similarity,
+        dedup_budget_factor=dedup_budget_factor,
+        llm_cache_path=llm_cache_path,
+        llm_cache_ttl=llm_cache_ttl,
+        llm_cache_max_entries=llm_cache_max_entries
     )
 
@@ -1,6 +1,17 @@
-from .state import PipelineState
+from .state import PipelineState, CategoryBranchState, PipelineContext
 from .workflow import DataPipelineWorkflow
 from .builder import PipelineBuilder
+from .events import PipelineEvent, EventSink, LoggingEventSink, JsonlEventSink, PrometheusTextfileSink
 
-__all__ = ["PipelineState", "DataPipelineWorkflow", "PipelineBuilder"]
-
+__all__ = [
+    "PipelineState",
+    "CategoryBranchState",
+    "PipelineContext",
+    "DataPipelineWorkflow",
+    "PipelineBuilder",
+    "PipelineEvent",
+    "EventSink",
+    "LoggingEventSink",
+    "JsonlEventSink",
+    "PrometheusTextfileSink"
+]
@@ -1,5 +1,7 @@
 import logging
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import END
 
 from .workflow import DataPipelineWorkflow
 from .state import PipelineState
@@ -9,9 +11,9 @@ logger = logging.getLogger(__name__)
 
 class PipelineBuilder:
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], checkpointer: Optional[BaseCheckpointSaver] = None):
         self.config = config
-        self.workflow = DataPipelineWorkflow(config)
+        self.workflow = DataPipelineWorkflow(config, checkpointer=checkpointer)
         self._node_order: list = []
     
     def add_node(self, name: str, node_func, after: Optional[str] = None):
@@ -25,6 +27,47 @@ class PipelineBuilder:
         self._node_order.append(name)
         return self
     
+    def add_fan_out(self, name: str, node_func, dispatch, after: Optional[str] = None):
+        """
+        Add a branch node that runs once per `Send` returned by `dispatch`, which is
+        evaluated on the state after `after` (defaults to the previously added node).
+        """
+        source = after or (self._node_order[-1] if self._node_order else None)
+        if source is None:
+            raise ValueError("Fan-out needs a preceding node to dispatch from")
+        
+        self.workflow.add_node(name, node_func)
+        self.workflow.add_conditional_edges(source, dispatch, [name])
+        
+        self._node_order.append(name)
+        return self
+    
+    def add_loop(
+        self,
+        name: str,
+        node_func,
+        should_continue: Callable[[PipelineState], bool],
+        after: Optional[str] = None
+    ):
+        """
+        Add a node that runs again for as long as `should_continue(state)` holds and then
+        ends the graph. Each pass is its own step, so it is checkpointed separately.
+        """
+        self.workflow.add_node(name, node_func)
+        
+        source = after or (self._node_order[-1] if self._node_order else None)
+        if source:
+            self.workflow.add_edge(source, name)
+        
+        self.workflow.add_conditional_edges(
+            name,
+            lambda state: name if should_continue(state) else END,
+            [name, END]
+        )
+        
+        self._node_order.append(name)
+        return self
+    
     def set_entry_point(self, node_name: str):
         self.workflow.set_entry_point(node_name)
         return self
@@ -39,7 +82,8 @@ class PipelineBuilder:
         
         if self._node_order:
             last_node = self._node_order[-1]
-            if not any(to == "END" for _, to in self.workflow.edges if _ == last_node):
+            routed = any(source == last_node for source, _, _ in self.workflow.conditional_edges)
+            if not routed and not any(to == "END" for _, to in self.workflow.edges if _ == last_node):
                 self.workflow.add_edge(last_node, "END")
         
         self.workflow.build()
@@ -52,10 +96,12 @@ class PipelineBuilder:
             categories=[],
             category_subcategories={},
             category_subcategory_keywords={},
+            keyword_budgets={},
+            keyword_duplicates={},
             collection_results=[],
+            completed_keywords=[],
             current_category="",
             current_subcategory="",
-            current_keyword="",
-            config=self.config
+            current_keyword=""
         )
 
@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def stage_key(stage: str, inputs: Dict[str, Any], identity: Dict[str, Any]) -> str:
+    """Stable hash of a stage call: stage name, its inputs and the agent identity (model, prompt version)."""
+    payload = json.dumps(
+        {"stage": stage, "inputs": inputs, "identity": identity},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    Persistent cache of LLM stage outputs keyed by `stage_key`.
+
+    Entries are written as soon as each call succeeds, so a rerun after a crash or
+    a prompt change only repeats the calls whose key changed or never completed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Stage calls run on worker threads and event loops, so the connection is shared under a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stage_cache ("
+            "key TEXT PRIMARY KEY, stage TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM stage_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, stage: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stage_cache (key, stage, value, created_at) VALUES (?, ?, ?, ?)",
+                (key, stage, json.dumps(value, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def lookup_cached(cache: Optional[StageCache], keys: List[str]) -> Tuple[List[Any], List[int]]:
+    """Return the cached value for every key (None on a miss) and the indices that still need computing."""
+    if cache is None:
+        return [None] * len(keys), list(range(len(keys)))
+    values = [cache.get(key) for key in keys]
+    return values, [i for i, value in enumerate(values) if value is None]
+
+
+def cache_writer(cache: Optional[StageCache], keys: List[str], stage: str) -> Optional[Callable[[int, Any], None]]:
+    """An `on_result` callback storing each non-empty result under `keys[index]` as soon as it arrives."""
+    if cache is None:
+        return None
+
+    def _store(index: int, value: Any):
+        # Empty answers are what a failed generation looks like, so they are never cached
+        if value:
+            cache.set(keys[index], stage, value)
+
+    return _store
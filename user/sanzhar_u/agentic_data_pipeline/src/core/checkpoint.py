@@ -0,0 +1,16 @@
+import os
+import sqlite3
+import logging
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+logger = logging.getLogger(__name__)
+
+
+def create_sqlite_checkpointer(path: str) -> SqliteSaver:
+    """SQLite checkpointer for crash-safe runs; close it with `checkpointer.conn.close()`."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Nodes run collection on worker threads, so the connection must not be pinned to one thread
+    conn = sqlite3.connect(path, check_same_thread=False)
+    logger.info("Checkpointing to %s", path)
+    return SqliteSaver(conn)
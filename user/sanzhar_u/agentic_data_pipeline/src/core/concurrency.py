@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from langchain_core.rate_limiters import BaseRateLimiter, InMemoryRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def create_rate_limiter(requests_per_minute: float) -> InMemoryRateLimiter:
+    return InMemoryRateLimiter(
+        requests_per_second=requests_per_minute / 60.0,
+        check_every_n_seconds=0.05,
+        max_bucket_size=1
+    )
+
+
+def call_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The pipeline's limits for a batch of agent calls, as `BaseAgent.abatch` keyword arguments.
+    The rate limiter is left out: PipelineConfig sets it on the model, which only takes a
+    token once its LLM cache lookup misses.
+    """
+    return {
+        "max_concurrency": config.get("max_concurrency", 8),
+        "max_retries": config.get("max_retries", 2),
+        "slots": config.get("call_slots")
+    }
+
+
+def run_async(coro: Awaitable) -> Any:
+    """Run a coroutine from a sync node, also when the caller already owns an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+@asynccontextmanager
+async def hold_slot(slots: Optional[threading.BoundedSemaphore], poll_interval: float = 0.02):
+    """Hold one of the process-wide `slots`, if given, for the duration of the block."""
+    if slots is None:
+        yield
+        return
+    # Polled instead of blocked on, so a waiting call never stalls its event loop
+    while not slots.acquire(blocking=False):
+        await asyncio.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+async def gather_limited(
+    calls: List[Callable[[], Awaitable]],
+    max_concurrency: int = 8,
+    rate_limiter: Optional[BaseRateLimiter] = None,
+    max_retries: int = 0,
+    retry_delay: float = 1.0,
+    latencies: Optional[List[float]] = None,
+    slots: Optional[threading.BoundedSemaphore] = None
+) -> List[Any]:
+    """
+    Await every call with at most `max_concurrency` in flight, each attempt first taking
+    a token from the shared rate limiter. A failing call is retried on its own up to
+    `max_retries` times with exponential backoff. Results come back in call order; a call
+    that still fails yields its exception instead of a result.
+    
+    `slots`, if given, bounds the calls in flight across every gather in the process,
+    e.g. those of concurrent fan-out branches running on their own event loops.
+    
+    If `latencies` is given it is filled, in call order, with the duration in seconds of
+    each call's last attempt (rate-limiter waits excluded).
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    durations = [0.0] * len(calls)
+
+    async def _run(index: int, call: Callable[[], Awaitable]) -> Any:
+        for attempt in range(max_retries + 1):
+            # The slot is released during backoff so retries do not starve other calls
+            async with semaphore, hold_slot(slots):
+                if rate_limiter is not None:
+                    await rate_limiter.aacquire()
+                started = time.perf_counter()
+                try:
+                    return await call()
+                except Exception as e:
+                    if attempt == max_retries:
+                        raise
+                    logger.warning("Call %d failed (attempt %d/%d): %s", index, attempt + 1, max_retries + 1, e)
+                finally:
+                    durations[index] = time.perf_counter() - started
+            await asyncio.sleep(retry_delay * 2 ** attempt)
+
+    results = await asyncio.gather(*(_run(i, call) for i, call in enumerate(calls)), return_exceptions=True)
+    if latencies is not None:
+        latencies.extend(durations)
+    return results
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "p50": ordered[int(0.50 * (len(ordered) - 1))],
+        "p95": ordered[int(0.95 * (len(ordered) - 1))],
+        "max": ordered[-1]
+    }
+
+
+class StagedExecutor:
+    """
+    Runs two-stage tasks: `start()` holds a scarce resource (a pooled browser) and runs on
+    `workers` threads, and the function it returns only waits for the rest of the task (its
+    downloads) on a second set of threads, so a finished first stage frees its thread at once.
+
+    Tasks keep running between calls to `wait`, so a caller can hand back each result as soon
+    as it is ready, e.g. once per graph step, without stalling the others at a barrier.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._starting = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage-start")
+        self._finishing = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage-finish")
+        self._lock = threading.Lock()
+        self._tasks: Dict[Hashable, Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._tasks
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+    def submit(self, key: Hashable, start: Callable[[], Callable[[], Any]]):
+        """Run `start` and then the function it returns; a key that is already running is left alone."""
+        with self._lock:
+            if key in self._tasks:
+                return
+            task = self._tasks[key] = Future()
+        started = time.perf_counter()
+
+        def _finish(finish: Callable[[], Any]):
+            try:
+                task.set_result((finish(), time.perf_counter() - started))
+            except BaseException as e:
+                task.set_exception(e)
+
+        def _start():
+            try:
+                finish = start()
+            except BaseException as e:
+                task.set_exception(e)
+                return
+            self._finishing.submit(_finish, finish)
+
+        self._starting.submit(_start)
+
+    def wait(self, timeout: Optional[float] = None) -> List[Tuple[Hashable, Any, float]]:
+        """
+        Block until at least one task is done and return (key, result, seconds) for every task
+        done by then, which no longer count as running. A failed task raises its exception.
+        """
+        with self._lock:
+            tasks = dict(self._tasks)
+        done, _ = wait(list(tasks.values()), timeout=timeout, return_when=FIRST_COMPLETED)
+        finished = [(key, task) for key, task in tasks.items() if task in done]
+        with self._lock:
+            for key, _ in finished:
+                del self._tasks[key]
+        return [(key, *task.result()) for key, task in finished]
+
+    def close(self):
+        self._starting.shutdown(wait=False, cancel_futures=True)
+        self._finishing.shutdown(wait=False, cancel_futures=True)
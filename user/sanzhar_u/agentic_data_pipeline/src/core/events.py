@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event types yielded by DataPipelineWorkflow.stream()
+RUN_START = "run_start"
+NODE_START = "node_start"
+NODE_END = "node_end"
+KEYWORD = "keyword"
+RUN_END = "run_end"
+
+
+@dataclass
+class PipelineEvent:
+    type: str
+    timestamp: float = field(default_factory=time.time)
+    # Seconds since the run started
+    elapsed: float = 0.0
+    node: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    # Final graph state, only set on run_end; kept out of the serialised event
+    state: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        event = {"type": self.type, "timestamp": self.timestamp, "elapsed": round(self.elapsed, 3)}
+        if self.node:
+            event["node"] = self.node
+        event.update(self.data)
+        return event
+
+
+def keyword_event_data(result: Dict[str, Any], duration: float) -> Dict[str, Any]:
+    """Payload of a keyword event, built from one collection result."""
+    return {
+        "category": result.get("category"),
+        "subcategory": result.get("subcategory"),
+        "keyword": result.get("keyword"),
+        "success": bool(result.get("success")),
+        "items": result.get("items_collected", 0),
+        "already_complete": bool(result.get("already_complete")),
+        "error": result.get("error"),
+        "duration": round(duration, 3)
+    }
+
+
+def summarize_update(update: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Item and error counts for a node's state update."""
+    if not update:
+        return {}
+    counts = {}
+    if "categories" in update:
+        counts["categories"] = len(update["categories"])
+    if "category_subcategories" in update:
+        counts["subcategories"] = sum(len(subs) for subs in update["category_subcategories"].values())
+    if "category_subcategory_keywords" in update:
+        counts["keywords"] = sum(
+            len(keywords)
+            for subcategories in update["category_subcategory_keywords"].values()
+            for keywords in subcategories.values()
+        )
+    if "collection_results" in update:
+        results = update["collection_results"]
+        counts["keywords_collected"] = len(results)
+        counts["items"] = sum(r.get("items_collected", 0) for r in results)
+        counts["errors"] = sum(1 for r in results if not r.get("success"))
+    return counts
+
+
+class EventSink:
+    def emit(self, event: PipelineEvent):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LoggingEventSink(EventSink):
+    """Logs node completions and keyword progress with a running rate."""
+
+    def __init__(self):
+        self.keywords = 0
+        self.items = 0
+
+    def emit(self, event: PipelineEvent):
+        if event.type == KEYWORD:
+            self.keywords += 1
+            self.items += event.data.get("items", 0)
+            rate = self.keywords / event.elapsed * 60 if event.elapsed else 0.0
+            logger.info(
+                "[%d keywords, %d items, %.1f keywords/min] '%s' %s in %.1fs",
+                self.keywords,
+                self.items,
+                rate,
+                event.data.get("keyword"),
+                "ok" if event.data.get("success") else "FAILED",
+                event.data.get("duration", 0.0)
+            )
+        elif event.type == NODE_END:
+            logger.info(
+                "Node '%s' finished in %.1fs %s",
+                event.node,
+                event.data.get("duration", 0.0),
+                {k: v for k, v in event.data.items() if k != "duration"}
+            )
+
+
+class JsonlEventSink(EventSink):
+    """Appends every event as one JSON line, flushed immediately so the file can be tailed."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, event: PipelineEvent):
+        self._file.write(json.dumps(event.to_dict(), ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class PrometheusTextfileSink(EventSink):
+    """
+    Keeps run counters and rewrites them in the Prometheus text format, for the
+    node_exporter textfile collector. The file is replaced atomically at most every
+    `min_interval` seconds, and always on run_end.
+    """
+
+    def __init__(self, path: str, min_interval: float = 5.0, prefix: str = "pipeline"):
+        self.path = path
+        self.min_interval = min_interval
+        self.prefix = prefix
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+        self.keywords = defaultdict(int)
+        self.items = 0
+        self.keyword_seconds = 0.0
+        self.node_runs = defaultdict(int)
+        self.node_seconds = defaultdict(float)
+        self.node_errors = defaultdict(int)
+        self.last_event = 0.0
+        self.running = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def emit(self, event: PipelineEvent):
+        with self._lock:
+            self.last_event = event.timestamp
+            if event.type == RUN_START:
+                self.running = 1
+            elif event.type == RUN_END:
+                self.running = 0
+            elif event.type == KEYWORD:
+                self.keywords["success" if event.data.get("success") else "failed"] += 1
+                self.items += event.data.get("items", 0)
+                self.keyword_seconds += event.data.get("duration", 0.0)
+            elif event.type == NODE_END:
+                self.node_runs[event.node] += 1
+                self.node_seconds[event.node] += event.data.get("duration", 0.0)
+                self.node_errors[event.node] += event.data.get("errors", 0) + (1 if event.data.get("failed") else 0)
+
+            if event.type == RUN_END or event.timestamp - self._last_write >= self.min_interval:
+                self._write()
+                self._last_write = event.timestamp
+
+    def _lines(self) -> Iterable[str]:
+        p = self.prefix
+        yield f"# TYPE {p}_running gauge"
+        yield f"{p}_running {self.running}"
+        yield f"# TYPE {p}_last_event_timestamp_seconds gauge"
+        yield f"{p}_last_event_timestamp_seconds {self.last_event:.3f}"
+        yield f"# TYPE {p}_keywords_total counter"
+        for status, count in sorted(self.keywords.items()):
+            yield f'{p}_keywords_total{{status="{status}"}} {count}'
+        yield f"# TYPE {p}_items_collected_total counter"
+        yield f"{p}_items_collected_total {self.items}"
+        yield f"# TYPE {p}_keyword_duration_seconds_total counter"
+        yield f"{p}_keyword_duration_seconds_total {self.keyword_seconds:.3f}"
+        yield f"# TYPE {p}_node_runs_total counter"
+        for node, count in sorted(self.node_runs.items()):
+            yield f'{p}_node_runs_total{{node="{node}"}} {count}'
+        yield f"# TYPE {p}_node_duration_seconds_total counter"
+        for node, seconds in sorted(self.node_seconds.items()):
+            yield f'{p}_node_duration_seconds_total{{node="{node}"}} {seconds:.3f}'
+        yield f"# TYPE {p}_node_errors_total counter"
+        for node, count in sorted(self.node_errors.items()):
+            yield f'{p}_node_errors_total{{node="{node}"}} {count}'
+
+    def _write(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self._lines()) + "\n")
+        # The collector must never read a half-written file
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        with self._lock:
+            self._write()
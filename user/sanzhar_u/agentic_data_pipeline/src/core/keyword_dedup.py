@@ -0,0 +1,115 @@
+import re
+import math
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+# Kazakh and Russian Cyrillic to Latin, close to the spellings models use for transliterated queries
+_CYRILLIC_TO_LATIN = {
+    "а": "a", "ә": "a", "б": "b", "в": "v", "г": "g", "ғ": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "қ": "q", "л": "l", "м": "m", "н": "n",
+    "ң": "ng", "о": "o", "ө": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ұ": "u",
+    "ү": "u", "ф": "f", "х": "kh", "һ": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+    "ъ": "", "ы": "y", "і": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya"
+}
+_TRANSLITERATION = str.maketrans(_CYRILLIC_TO_LATIN)
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Casefold, transliterate Cyrillic to Latin, drop diacritics and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKC", keyword).casefold().translate(_TRANSLITERATION)
+    text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def char_ngrams(text: str, n: int = 3) -> Counter:
+    """Character n-grams of each word padded with spaces, so word starts and ends are features too."""
+    grams = Counter()
+    for word in text.split():
+        padded = f" {word} "
+        for i in range(max(1, len(padded) - n + 1)):
+            grams[padded[i:i + n]] += 1
+    return grams
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # The lower index stays root, so a cluster is represented by its first keyword
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def cluster_keywords(
+    keywords: List[str],
+    threshold: float = 0.8,
+    n: int = 3,
+    max_posting: int = 200
+) -> List[List[int]]:
+    """
+    Group near-duplicate keywords by cosine similarity of TF-IDF weighted character
+    n-grams over their normalized form. Candidate pairs come from an inverted index
+    over n-grams, which accumulates their dot products as it goes. N-grams shared by more
+    than `max_posting` keywords (country names, "traditional") never generate candidates,
+    so posting lists stay short; they are added only for pairs they could still push
+    over the threshold. Returns clusters of indices in input order, singletons included.
+    """
+    normalized = [normalize_keyword(keyword) for keyword in keywords]
+    grams = [char_ngrams(text, n) for text in normalized]
+    document_frequency = Counter(gram for counts in grams for gram in counts)
+    total = len(keywords)
+
+    vectors: List[Dict[str, float]] = []
+    for counts in grams:
+        vector = {gram: count * (math.log((1 + total) / (1 + document_frequency[gram])) + 1) for gram, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({gram: weight / norm for gram, weight in vector.items()})
+
+    union_find = _UnionFind(total)
+    # Keywords that normalize to the same text are duplicates whatever their n-grams
+    first_seen: Dict[str, int] = {}
+    for i, text in enumerate(normalized):
+        if text in first_seen:
+            union_find.union(i, first_seen[text])
+        else:
+            first_seen[text] = i
+
+    # Norm of each vector's frequent-n-gram part, bounding what those n-grams can add to a dot product
+    residual = [
+        math.sqrt(sum(weight * weight for gram, weight in vector.items() if document_frequency[gram] > max_posting))
+        for vector in vectors
+    ]
+    postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    for i, vector in enumerate(vectors):
+        # Partial dot products with earlier keywords, accumulated over the rare n-grams they share
+        scores: Dict[int, float] = defaultdict(float)
+        frequent = []
+        for gram, weight in vector.items():
+            if document_frequency[gram] > max_posting:
+                frequent.append((gram, weight))
+                continue
+            for j, other_weight in postings[gram]:
+                scores[j] += weight * other_weight
+            postings[gram].append((i, weight))
+        for j, score in scores.items():
+            if score + residual[i] * residual[j] < threshold:
+                continue
+            other = vectors[j]
+            score += sum(weight * other.get(gram, 0.0) for gram, weight in frequent)
+            if score >= threshold:
+                union_find.union(i, j)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(total):
+        clusters[union_find.find(i)].append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
@@ -0,0 +1,133 @@
+import os
+import time
+import sqlite3
+import hashlib
+import inspect
+import logging
+import threading
+import warnings
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# loads() is marked beta and would warn on every cache hit
+warnings.filterwarnings("ignore", category=LangChainBetaWarning, module=__name__)
+
+# The file is written only by this cache, so the core LangChain classes are safe to revive.
+# Releases before `allowed_objects` existed (e.g. 0.3.64) only have the namespace check,
+# which the defaults already apply.
+_LOADS_OPTIONS = {"allowed_objects": "core"} if "allowed_objects" in inspect.signature(loads).parameters else {}
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    LangChain LLM response cache in SQLite, shared by every agent once installed with
+    `set_llm_cache`. Entries are keyed by the prompt and LangChain's `llm_string`, which
+    covers the model name, temperature and the other call parameters.
+
+    Entries older than `ttl` seconds count as misses and are dropped; beyond
+    `max_entries` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Sync calls come from node threads and async ones from executor threads, so one connection is shared under a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        if ttl is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - ttl,))
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and row[1] < now - self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return loads(row[0], **_LOADS_OPTIONS)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        value = dumps(list(return_val))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, now, now)
+            )
+            if self.max_entries is not None:
+                excess = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN "
+                        "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                        (excess,)
+                    )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def configure_llm_cache(
+    path: str,
+    ttl: Optional[float] = None,
+    max_entries: Optional[int] = None
+) -> SQLiteLLMCache:
+    """Create an SQLiteLLMCache and install it as LangChain's global LLM cache."""
+    cache = SQLiteLLMCache(path, ttl=ttl, max_entries=max_entries)
+    set_llm_cache(cache)
+    logger.info("LLM response cache: %s (%d entries)", path, cache.stats()["entries"])
+    return cache
+
+
+def configure_llm_cache_from_env() -> Optional[SQLiteLLMCache]:
+    """configure_llm_cache from LLM_CACHE_PATH, LLM_CACHE_TTL and LLM_CACHE_MAX_ENTRIES; None when no path is set."""
+    path = os.getenv("LLM_CACHE_PATH")
+    if not path:
+        return None
+    ttl = os.getenv("LLM_CACHE_TTL")
+    max_entries = os.getenv("LLM_CACHE_MAX_ENTRIES")
+    return configure_llm_cache(
+        path,
+        ttl=float(ttl) if ttl else None,
+        max_entries=int(max_entries) if max_entries else None
+    )
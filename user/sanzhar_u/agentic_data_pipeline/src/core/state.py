@@ -1,4 +1,10 @@
-from typing import TypedDict, List, Dict, Any, Optional
+import operator
+from typing import Annotated, TypedDict, List, Dict, Any, Optional
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer that lets parallel category branches each contribute their own keys."""
+    return {**left, **right}
 
 
 class PipelineState(TypedDict):
@@ -10,19 +16,50 @@ class PipelineState(TypedDict):
     categories: List[Dict[str, str]]
     
     # Subcategory generation (nested structure)
-    category_subcategories: Dict[str, List[Dict[str, str]]]
+    category_subcategories: Annotated[Dict[str, List[Dict[str, str]]], merge_dicts]
     
     # Keyword generation (nested structure: category -> subcategory -> keywords)
-    category_subcategory_keywords: Dict[str, Dict[str, List[str]]]
+    category_subcategory_keywords: Annotated[Dict[str, Dict[str, List[str]]], merge_dicts]
+    
+    # Image budget of keywords that absorbed near-duplicates, and the keywords each one replaced
+    # (nested like the keywords: category -> subcategory -> keyword)
+    keyword_budgets: Annotated[Dict[str, Dict[str, Dict[str, int]]], merge_dicts]
+    keyword_duplicates: Annotated[Dict[str, Dict[str, Dict[str, List[str]]]], merge_dicts]
     
-    # Collection results (generic - can be images, text, etc.)
-    collection_results: List[Dict[str, Any]]
+    # Collection results (generic - can be images, text, etc.), appended by each writer
+    collection_results: Annotated[List[Dict[str, Any]], operator.add]
+    
+    # [category, subcategory, keyword] of every finished keyword job; a resumed run collects the rest
+    completed_keywords: Annotated[List[List[str]], operator.add]
     
     # Current processing state
     current_category: str
     current_subcategory: str
     current_keyword: str
-    
-    # Configuration (stored in state for access by nodes)
-    config: Dict[str, Any]
 
+
+class CategoryBranchState(TypedDict):
+    # Input of a single fan-out branch (see nodes.category_branch_node)
+    category: Dict[str, str]
+    original_context: str
+
+
+class PipelineContext(TypedDict, total=False):
+    """
+    Run-scoped dependencies (see PipelineConfig.to_dict), handed to nodes as
+    `runtime.context`. They are never part of the state, so they are not copied
+    between steps or written to checkpoints.
+    """
+    agents: Dict[str, Any]
+    collector: Any
+    collection_config: Dict[str, Any]
+    collection_executor: Any
+    max_concurrency: int
+    call_slots: Any
+    max_retries: int
+    keyword_batch_size: int
+    keyword_dedup: bool
+    keyword_similarity: float
+    dedup_budget_factor: float
+    rate_limiter: Any
+    stage_cache: Optional[Any]
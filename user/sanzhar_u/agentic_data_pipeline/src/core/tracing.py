@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+_NULL_SPAN = nullcontext()
+
+
+class NoopTracer:
+    """Default tracer: spans record nothing and reuse one shared null context."""
+
+    enabled = False
+
+    def span(self, name: str, **attrs) -> ContextManager[None]:
+        return _NULL_SPAN
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {}
+
+
+class Tracer(NoopTracer):
+    """
+    In-memory span recorder. Spans are timed with perf_counter and kept until
+    exported as a Chrome trace (chrome://tracing, Perfetto) or summarised per name.
+
+    Spans opened inside an asyncio task get that task's own track, so concurrent
+    downloads on one event loop do not appear as wrongly nested.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _track() -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return id(task) if task is not None else threading.get_ident()
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[None]:
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            record = {
+                "name": name,
+                "start": start - self._origin,
+                "duration": time.perf_counter() - start,
+                "track": self._track(),
+                "attrs": attrs
+            }
+            if error:
+                record["attrs"] = {**attrs, "error": error}
+            with self._lock:
+                self.spans.append(record)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """count / total / p50 / p95 / max seconds per span name."""
+        with self._lock:
+            durations = defaultdict(list)
+            for record in self.spans:
+                durations[record["name"]].append(record["duration"])
+        stats = {}
+        for name, values in durations.items():
+            values.sort()
+            stats[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "p50": values[int(0.50 * (len(values) - 1))],
+                "p95": values[int(0.95 * (len(values) - 1))],
+                "max": values[-1]
+            }
+        return stats
+
+    def format_summary(self) -> str:
+        rows = sorted(self.summary().items(), key=lambda item: item[1]["total"], reverse=True)
+        width = max([len(name) for name, _ in rows] + [4])
+        lines = [f"{'span':<{width}} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for name, s in rows:
+            lines.append(
+                f"{name:<{width}} {s['count']:>7} {s['total']:>9.2f} "
+                f"{s['p50'] * 1000:>9.1f} {s['p95'] * 1000:>9.1f} {s['max'] * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str):
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {
+                "name": record["name"],
+                "ph": "X",
+                "ts": round(record["start"] * 1e6, 1),
+                "dur": round(record["duration"] * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": record["track"],
+                "args": record["attrs"]
+            }
+            for record in spans
+        ]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        logger.info("Wrote %d spans to %s", len(events), path)
+
+
+_tracer: NoopTracer = NoopTracer()
+
+
+def get_tracer() -> NoopTracer:
+    return _tracer
+
+
+def set_tracer(tracer: NoopTracer) -> NoopTracer:
+    """Install the process-wide tracer used by agents, scrapers and nodes; returns the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
@@ -1,17 +1,37 @@
+import time
 import logging
-from typing import Dict, Any, Callable, List, Optional
+import functools
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, END
 
-from .state import PipelineState
+from .events import EventSink, PipelineEvent, summarize_update, RUN_START, NODE_START, NODE_END, KEYWORD, RUN_END
+from .state import PipelineState, PipelineContext
+from .tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
 
+def _traced(name: str, node_func: Callable, default_context: Dict[str, Any]) -> Callable:
+    # functools.wraps keeps the signature visible, so LangGraph still injects `runtime`
+    @functools.wraps(node_func)
+    def wrapper(*args, **kwargs):
+        runtime = kwargs.get("runtime")
+        if runtime is not None and runtime.context is None:
+            # Callers that pass no context, e.g. LangGraph Studio, run with the config the graph was built from
+            kwargs["runtime"] = runtime.override(context=default_context)
+        with get_tracer().span(f"node.{name}"):
+            return node_func(*args, **kwargs)
+    return wrapper
+
+
 class DataPipelineWorkflow:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], checkpointer: Optional[BaseCheckpointSaver] = None):
         self.config = config
+        self.checkpointer = checkpointer
         self.nodes: Dict[str, Callable] = {}
         self.edges: List[tuple] = []
+        self.conditional_edges: List[tuple] = []
         self.entry_point: Optional[str] = None
         self.graph: Optional[StateGraph] = None
     
@@ -23,6 +43,11 @@ class DataPipelineWorkflow:
         self.edges.append((from_node, to_node))
         logger.debug("Added edge: %s -> %s", from_node, to_node)
     
+    def add_conditional_edges(self, from_node: str, router: Callable, destinations: List[str]):
+        """Route from `from_node` with `router`, which may also return `Send` packets for fan-out."""
+        self.conditional_edges.append((from_node, router, destinations))
+        logger.debug("Added conditional edge: %s -> %s", from_node, destinations)
+    
     def set_entry_point(self, node_name: str):
         self.entry_point = node_name
         logger.debug("Set entry point: %s", node_name)
@@ -34,10 +59,10 @@ class DataPipelineWorkflow:
         if not self.nodes:
             raise ValueError("No nodes added. Add nodes before building.")
         
-        workflow = StateGraph(PipelineState)
+        workflow = StateGraph(PipelineState, context_schema=PipelineContext)
         
         for name, node_func in self.nodes.items():
-            workflow.add_node(name, node_func)
+            workflow.add_node(name, _traced(name, node_func, self.config))
         
         workflow.set_entry_point(self.entry_point)
         
@@ -47,19 +72,123 @@ class DataPipelineWorkflow:
             else:
                 workflow.add_edge(from_node, to_node)
         
-        self.graph = workflow.compile()
-        logger.info("Workflow built with %d nodes and %d edges", len(self.nodes), len(self.edges))
+        for from_node, router, destinations in self.conditional_edges:
+            workflow.add_conditional_edges(from_node, router, destinations)
+        
+        self.graph = workflow.compile(checkpointer=self.checkpointer)
+        logger.info(
+            "Workflow built with %d nodes and %d edges",
+            len(self.nodes),
+            len(self.edges) + len(self.conditional_edges)
+        )
         return self.graph
     
-    def run(self, initial_state: PipelineState) -> Dict[str, Any]:
+    def _prepare(
+        self,
+        initial_state: PipelineState,
+        thread_id: Optional[str],
+        recursion_limit: int
+    ) -> Tuple[Optional[PipelineState], Dict[str, Any]]:
+        """Graph input and run config; the input is None when an interrupted thread is resumed."""
         if self.graph is None:
             self.build()
         
-        if "config" not in initial_state:
-            initial_state["config"] = self.config
+        # Collection takes a step per finished keyword, so long runs need far more steps than the default 25
+        run_config = {"configurable": {}, "recursion_limit": recursion_limit}
+        
+        if self.checkpointer is not None:
+            if not thread_id:
+                raise ValueError("A thread_id is required when the workflow has a checkpointer.")
+            run_config["configurable"]["thread_id"] = thread_id
+            snapshot = self.graph.get_state(run_config)
+            if snapshot.next:
+                logger.info("Resuming thread '%s' at: %s", thread_id, ", ".join(snapshot.next))
+                return None, run_config
+            if snapshot.values:
+                # A finished thread starts over; the reducers would otherwise add to its old results
+                logger.info("Thread '%s' already completed, starting a new run", thread_id)
+                self.checkpointer.delete_thread(thread_id)
+        
+        return initial_state, run_config
+    
+    def run(
+        self,
+        initial_state: PipelineState,
+        thread_id: Optional[str] = None,
+        recursion_limit: int = 100000
+    ) -> Dict[str, Any]:
+        """
+        Run the graph with the pipeline config as the runtime context, so agents and
+        collectors never enter the state or its checkpoints.
+        
+        With a checkpointer, `thread_id` names the run: if that thread stopped before
+        finishing, it is resumed from its last checkpoint instead of starting over.
+        """
+        graph_input, run_config = self._prepare(initial_state, thread_id, recursion_limit)
         
         logger.info("Starting workflow execution")
-        final_state = self.graph.invoke(initial_state)
+        final_state = self.graph.invoke(graph_input, run_config, context=self.config)
         logger.info("Workflow execution completed")
         return final_state
-
+    
+    def stream(
+        self,
+        initial_state: PipelineState,
+        thread_id: Optional[str] = None,
+        recursion_limit: int = 100000,
+        sinks: Sequence[EventSink] = ()
+    ) -> Iterator[PipelineEvent]:
+        """
+        Like `run`, but yields progress events while the graph executes: run_start,
+        node_start / node_end per node (with duration, item and error counts), one
+        keyword event per collected keyword, and run_end carrying the final state.
+        Every event is also passed to each sink as it happens.
+        """
+        graph_input, run_config = self._prepare(initial_state, thread_id, recursion_limit)
+        started = time.time()
+        
+        def event(event_type: str, node: Optional[str] = None, data: Optional[Dict[str, Any]] = None, **kwargs) -> PipelineEvent:
+            now = time.time()
+            pipeline_event = PipelineEvent(event_type, now, now - started, node, data or {}, **kwargs)
+            for sink in sinks:
+                try:
+                    sink.emit(pipeline_event)
+                except Exception as e:
+                    logger.error("Event sink %s failed: %s", type(sink).__name__, e)
+            return pipeline_event
+        
+        yield event(RUN_START, data={"thread_id": thread_id, "resumed": graph_input is None})
+        
+        task_starts: Dict[str, float] = {}
+        final_state = None
+        totals = {"keywords": 0, "items": 0, "errors": 0}
+        try:
+            for mode, chunk in self.graph.stream(
+                graph_input,
+                run_config,
+                context=self.config,
+                stream_mode=["tasks", "custom", "values"]
+            ):
+                if mode == "values":
+                    final_state = chunk
+                elif mode == "custom":
+                    if isinstance(chunk, dict) and chunk.get("event") == KEYWORD:
+                        totals["keywords"] += 1
+                        totals["items"] += chunk["data"].get("items", 0)
+                        totals["errors"] += 0 if chunk["data"].get("success") else 1
+                        yield event(KEYWORD, data=chunk["data"])
+                elif "result" not in chunk and "error" not in chunk:
+                    task_starts[chunk["id"]] = time.time()
+                    yield event(NODE_START, chunk["name"])
+                else:
+                    data = {"duration": round(time.time() - task_starts.pop(chunk["id"], started), 3)}
+                    if isinstance(chunk.get("result"), dict):
+                        data.update(summarize_update(chunk["result"]))
+                    if chunk.get("error"):
+                        data.update(failed=True, error=str(chunk["error"]))
+                    yield event(NODE_END, chunk["name"], data)
+        except Exception as e:
+            yield event(RUN_END, data={"duration": round(time.time() - started, 3), "failed": True, "error": str(e), **totals})
+            raise
+        
+        yield event(RUN_END, data={"duration": round(time.time() - started, 3), **totals}, state=final_state)
@@ -1,12 +1,17 @@
 from .category_node import extract_categories_node
 from .subcategory_node import generate_subcategories_node
 from .keyword_node import generate_keywords_node
-from .collection_node import collect_data_node
+from .dedupe_node import dedupe_keywords_node
+from .collection_node import collect_data_node, collection_pending
+from .category_branch_node import dispatch_categories, process_category_node
 
 __all__ = [
     "extract_categories_node",
     "generate_subcategories_node",
     "generate_keywords_node",
-    "collect_data_node"
+    "dedupe_keywords_node",
+    "collect_data_node",
+    "collection_pending",
+    "dispatch_categories",
+    "process_category_node"
 ]
-
@@ -0,0 +1,69 @@
+import logging
+from typing import Any, Dict, List
+from langgraph.runtime import Runtime
+from langgraph.types import Send
+
+from ..core.state import PipelineState, CategoryBranchState, PipelineContext
+from .subcategory_node import generate_category_subcategories
+from .keyword_node import generate_category_keywords
+from .dedupe_node import dedupe_category_keywords
+from .collection_node import collect_category_keywords
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_BRANCH_NODE = "process_category"
+
+
+def dispatch_categories(state: PipelineState) -> List[Send]:
+    """Map step of fan-out mode: one `process_category` branch per extracted category."""
+    country_or_culture = state.get("original_context", state["free_text"])
+    return [
+        Send(CATEGORY_BRANCH_NODE, {
+            "category": category,
+            "original_context": country_or_culture
+        })
+        for category in state["categories"]
+    ]
+
+
+def process_category_node(state: CategoryBranchState, runtime: Runtime[PipelineContext]) -> Dict[str, Any]:
+    """
+    Run subcategory -> keyword -> collection for a single category.
+    
+    Only the keys owned by this category are returned; the reducers on
+    PipelineState merge them with the other branches.
+    """
+    category = state["category"]
+    category_name = category["name"]
+    pipeline_config = runtime.context
+    logger.info("Processing category branch '%s'...", category_name)
+    
+    category_subcategories = generate_category_subcategories(
+        [category], state["original_context"], pipeline_config
+    )
+    category_subcategory_keywords = generate_category_keywords(
+        [category], category_subcategories, state["original_context"], pipeline_config
+    )
+    keyword_budgets, keyword_duplicates = {}, {}
+    if pipeline_config.get("keyword_dedup", False):
+        # Branches run independently, so near-duplicates are only collapsed within the category
+        category_subcategory_keywords, keyword_budgets, keyword_duplicates = dedupe_category_keywords(
+            [category], category_subcategory_keywords, pipeline_config
+        )
+    collection_results = collect_category_keywords(
+        [category], category_subcategory_keywords, pipeline_config, runtime.stream_writer, keyword_budgets
+    )
+    
+    logger.info(
+        "Finished category branch '%s': %d keywords processed",
+        category_name,
+        len(collection_results)
+    )
+    
+    return {
+        "category_subcategories": category_subcategories,
+        "category_subcategory_keywords": category_subcategory_keywords,
+        "keyword_budgets": keyword_budgets,
+        "keyword_duplicates": keyword_duplicates,
+        "collection_results": collection_results
+    }
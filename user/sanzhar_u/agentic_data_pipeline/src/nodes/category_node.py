@@ -1,22 +1,29 @@
 import logging
-from ..core.state import PipelineState
+from typing import Any, Dict
+from langgraph.runtime import Runtime
+from ..core.state import PipelineState, PipelineContext
+from ..core.cache import stage_key
 from ..agents import CategoryAgent
 
 logger = logging.getLogger(__name__)
 
 
-def extract_categories_node(state: PipelineState) -> PipelineState:
+def extract_categories_node(state: PipelineState, runtime: Runtime[PipelineContext]) -> Dict[str, Any]:
     logger.info("Extracting categories from input...")
     
-    category_agent: CategoryAgent = state["config"]["agents"]["category_agent"]
+    category_agent: CategoryAgent = runtime.context["agents"]["category_agent"]
     
-    categories = category_agent.extract_categories(state["free_text"])
+    stage_cache = runtime.context.get("stage_cache")
+    key = stage_key("categories", {"free_text": state["free_text"]}, category_agent.cache_identity)
     
-    return {
-        **state,
-        "categories": categories,
-        "category_subcategories": {},
-        "category_subcategory_keywords": {},
-        "collection_results": []
-    }
+    categories = stage_cache.get(key) if stage_cache else None
+    if categories is not None:
+        logger.info("Using %d cached categories", len(categories))
+    else:
+        categories = category_agent.extract_categories(state["free_text"])
+        # An empty list is what the agent returns on failure, so it is never cached
+        if stage_cache and categories:
+            stage_cache.set(key, "categories", categories)
+    
+    return {"categories": categories}
 
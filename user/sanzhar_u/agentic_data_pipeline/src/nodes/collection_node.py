@@ -1,81 +1,230 @@
 import logging
 import os
-from ..core.state import PipelineState
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from langgraph.runtime import Runtime
+from ..core.events import KEYWORD, keyword_event_data
+from ..core.concurrency import StagedExecutor
+from ..core.state import PipelineState, PipelineContext
 
 logger = logging.getLogger(__name__)
 
 
-def collect_data_node(state: PipelineState) -> PipelineState:
-    logger.info("Starting data collection for all keywords...")
+def start_keyword(
+    collector,
+    collection_config: Dict[str, Any],
+    category_name: str,
+    subcategory_name: str,
+    keyword: str
+) -> Callable[[], Dict[str, Any]]:
+    """
+    Start collecting one keyword and return a function that waits for the rest of it
+    (see `BaseCollector.start_collect`) and returns the keyword's result.
+    """
+    logger.info(
+        "Collecting data for keyword '%s' (category: %s, subcategory: %s)",
+        keyword,
+        category_name,
+        subcategory_name
+    )
     
-    collector = state["config"]["collector"]
-    collection_config = state["config"]["collection_config"]
+    keyword_path = os.path.join(
+        collection_config.get("data_path", "./data"),
+        category_name,
+        subcategory_name
+    )
     
-    collection_results = []
+    def failed(e: Exception) -> Dict[str, Any]:
+        logger.error("Error collecting data for keyword '%s': %s", keyword, e)
+        return {
+            "success": False,
+            "category": category_name,
+            "subcategory": subcategory_name,
+            "keyword": keyword,
+            "error": str(e)
+        }
     
-    data_path = collection_config.get("data_path", "./data")
-    os.makedirs(data_path, exist_ok=True)
+    try:
+        if collection_config.get("skip_complete", True) and collector.is_complete(keyword, keyword_path, collection_config):
+            logger.info("Keyword '%s' already has enough items, skipping", keyword)
+            skipped = {
+                "success": True,
+                "category": category_name,
+                "subcategory": subcategory_name,
+                "keyword": keyword,
+                "items_collected": 0,
+                "already_complete": True,
+                "output_path": os.path.join(keyword_path, keyword)
+            }
+            return lambda: skipped
+        
+        finish_collect = collector.start_collect(
+            keyword=keyword,
+            output_path=keyword_path,
+            config=collection_config,
+            metadata={"category": category_name, "subcategory": subcategory_name}
+        )
+    
+    except Exception as e:
+        result = failed(e)
+        return lambda: result
     
-    for category in state["categories"]:
-        category_name = category["name"]
-        category_keywords = state["category_subcategory_keywords"].get(category_name, {})
+    def finish() -> Dict[str, Any]:
+        try:
+            result = finish_collect()
+        except Exception as e:
+            return failed(e)
+        
+        result.update({
+            "category": category_name,
+            "subcategory": subcategory_name,
+            "keyword": keyword
+        })
         
-        for subcategory_name, keywords in category_keywords.items():
-            for keyword in keywords:
-                logger.info(
-                    "Collecting data for keyword '%s' (category: %s, subcategory: %s)",
-                    keyword,
-                    category_name,
-                    subcategory_name
-                )
-                
-                keyword_path = os.path.join(
-                    data_path,
-                    category_name,
-                    subcategory_name
-                )
-                
-                try:
-                    result = collector.collect(
-                        keyword=keyword,
-                        output_path=keyword_path,
-                        config=collection_config
-                    )
-                    
-                    result.update({
-                        "category": category_name,
-                        "subcategory": subcategory_name,
-                        "keyword": keyword
-                    })
-                    
-                    collection_results.append(result)
-                    
-                    if result.get("success"):
-                        logger.info(
-                            "Successfully collected data for keyword '%s'",
-                            keyword
-                        )
-                    else:
-                        logger.error(
-                            "Failed to collect data for keyword '%s': %s",
-                            keyword,
-                            result.get("error", "Unknown error")
-                        )
-                
-                except Exception as e:
-                    logger.error("Error collecting data for keyword '%s': %s", keyword, e)
-                    collection_results.append({
-                        "success": False,
-                        "category": category_name,
-                        "subcategory": subcategory_name,
-                        "keyword": keyword,
-                        "error": str(e)
-                    })
+        if result.get("success"):
+            logger.info(
+                "Successfully collected data for keyword '%s'",
+                keyword
+            )
+        else:
+            logger.error(
+                "Failed to collect data for keyword '%s': %s",
+                keyword,
+                result.get("error", "Unknown error")
+            )
+        return result
     
-    logger.info("Completed data collection. Processed %d keywords", len(collection_results))
+    return finish
+
+
+def collect_keyword(
+    collector,
+    collection_config: Dict[str, Any],
+    category_name: str,
+    subcategory_name: str,
+    keyword: str
+) -> Dict[str, Any]:
+    return start_keyword(collector, collection_config, category_name, subcategory_name, keyword)()
+
+
+def collection_jobs(
+    categories: List[Dict[str, str]],
+    category_subcategory_keywords: Dict[str, Dict[str, List[str]]]
+) -> List[Tuple[str, str, str]]:
+    """(category, subcategory, keyword) jobs in a stable order, so a cursor into them survives a restart."""
+    return [
+        (category["name"], subcategory_name, keyword)
+        for category in categories
+        for subcategory_name, keywords in category_subcategory_keywords.get(category["name"], {}).items()
+        for keyword in keywords
+    ]
+
+
+def _job_start(
+    collector,
+    collection_config: Dict[str, Any],
+    keyword_budgets: Dict[str, Dict[str, Dict[str, int]]],
+    job: Tuple[str, str, str]
+) -> Callable[[], Callable[[], Dict[str, Any]]]:
+    category_name, subcategory_name, keyword = job
+    budget = keyword_budgets.get(category_name, {}).get(subcategory_name, {}).get(keyword)
+    job_config = collection_config if budget is None else {**collection_config, "number_of_images": budget}
+    return partial(start_keyword, collector, job_config, *job)
+
+
+def collect_jobs(
+    jobs: List[Tuple[str, str, str]],
+    config: Dict[str, Any],
+    stream_writer: Optional[Callable[[Any], None]] = None,
+    keyword_budgets: Optional[Dict[str, Dict[str, Dict[str, int]]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Collect every job; with a `stream_writer`, a keyword event is written as each one finishes.
+    A job listed in `keyword_budgets` (category -> subcategory -> keyword) collects that many
+    items instead of `number_of_images`.
+    """
+    collector = config["collector"]
+    collection_config = config["collection_config"]
+    os.makedirs(collection_config.get("data_path", "./data"), exist_ok=True)
+    keyword_budgets = keyword_budgets or {}
     
+    # Discovery blocks on the collector's browser pool, so throughput follows the configured pool
+    # size; a keyword's remaining downloads are waited for apart from it (see StagedExecutor)
+    executor = StagedExecutor(collection_config.get("browser_pool_size", 1))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    try:
+        for index, job in enumerate(jobs):
+            executor.submit(index, _job_start(collector, collection_config, keyword_budgets, job))
+        # Events are written from the node's own thread, where LangGraph's stream context lives
+        while len(executor):
+            for index, result, duration in executor.wait():
+                results[index] = result
+                if stream_writer is not None:
+                    stream_writer({"event": KEYWORD, "data": keyword_event_data(result, duration)})
+    finally:
+        executor.close()
+    return results
+
+
+def collect_category_keywords(
+    categories: List[Dict[str, str]],
+    category_subcategory_keywords: Dict[str, Dict[str, List[str]]],
+    config: Dict[str, Any],
+    stream_writer: Optional[Callable[[Any], None]] = None,
+    keyword_budgets: Optional[Dict[str, Dict[str, Dict[str, int]]]] = None
+) -> List[Dict[str, Any]]:
+    return collect_jobs(
+        collection_jobs(categories, category_subcategory_keywords), config, stream_writer, keyword_budgets
+    )
+
+
+def collect_data_node(state: PipelineState, runtime: Runtime[PipelineContext]) -> Dict[str, Any]:
+    """
+    Collect until at least `collection_batch_size` more keywords (default 1) have finished
+    and record each of them in `completed_keywords`.
+    
+    The node loops on itself until every keyword is done (see `collection_pending`). Keywords
+    run on the run's `collection_executor`, which keeps collecting while a step is being
+    checkpointed, so the browser pool never waits at a step boundary; a resumed run
+    collects exactly the keywords that were not completed.
+    """
+    collection_config = runtime.context["collection_config"]
+    executor: StagedExecutor = runtime.context["collection_executor"]
+    jobs = list(dict.fromkeys(collection_jobs(state["categories"], state["category_subcategory_keywords"])))
+    completed = {tuple(job) for job in state.get("completed_keywords", [])}
+    remaining = {job for job in jobs if job not in completed}
+    if not completed:
+        logger.info("Starting data collection for %d keywords...", len(jobs))
+    os.makedirs(collection_config.get("data_path", "./data"), exist_ok=True)
+    
+    # After the first step every remaining keyword is already queued or running, which the
+    # count shows without walking the jobs; a resumed run queues them all again
+    if len(executor) != len(remaining):
+        keyword_budgets = state.get("keyword_budgets") or {}
+        for job in jobs:
+            if job in remaining:
+                executor.submit(job, _job_start(runtime.context["collector"], collection_config, keyword_budgets, job))
+    
+    batch_size = max(1, collection_config.get("collection_batch_size") or 1)
+    collection_results, finished = [], []
+    while len(finished) < min(batch_size, len(remaining)) and len(executor):
+        for job, result, duration in executor.wait():
+            # Anything else the executor returns belongs to an abandoned run with different keywords
+            if job not in remaining:
+                continue
+            finished.append(list(job))
+            collection_results.append(result)
+            runtime.stream_writer({"event": KEYWORD, "data": keyword_event_data(result, duration)})
+    
+    logger.info("Collected %d / %d keywords", len(completed) + len(finished), len(jobs))
+    
+    # Both reducers append, so each step only returns the keywords it saw finish
     return {
-        **state,
-        "collection_results": collection_results
+        "collection_results": collection_results,
+        "completed_keywords": finished
     }
 
+
+def collection_pending(state: PipelineState) -> bool:
+    jobs = set(collection_jobs(state["categories"], state["category_subcategory_keywords"]))
+    return bool(jobs - {tuple(job) for job in state.get("completed_keywords", [])})
@@ -0,0 +1,93 @@
+"""Node that collapses near-duplicate keywords before collection."""
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+from langgraph.runtime import Runtime
+from ..core.state import PipelineState, PipelineContext
+from ..core.keyword_dedup import cluster_keywords
+
+logger = logging.getLogger(__name__)
+
+
+def dedupe_category_keywords(
+    categories: List[Dict[str, str]],
+    category_subcategory_keywords: Dict[str, Dict[str, List[str]]],
+    config: Dict[str, Any]
+) -> Tuple[Dict[str, Dict[str, List[str]]], Dict[str, Dict[str, Dict[str, int]]], Dict[str, Dict[str, Dict[str, List[str]]]]]:
+    """
+    Cluster near-duplicate keywords across all subcategories and keep the first keyword
+    of each cluster, except that a subcategory never loses its last keyword. Each kept
+    keyword's image budget grows with the number of keywords it replaced, up to
+    `dedup_budget_factor` times the base `number_of_images`.
+
+    Returns the deduplicated keywords, the budgets that differ from the base and the
+    keywords each kept keyword replaced, both nested as category -> subcategory -> keyword
+    like the keywords themselves, since the same keyword may appear in several subcategories.
+    """
+    entries = [
+        (category["name"], subcategory_name, keyword)
+        for category in categories
+        for subcategory_name, keywords in category_subcategory_keywords.get(category["name"], {}).items()
+        for keyword in keywords
+    ]
+    clusters = cluster_keywords(
+        [keyword for _, _, keyword in entries],
+        threshold=config.get("keyword_similarity", 0.8)
+    )
+
+    remaining = Counter((category_name, subcategory_name) for category_name, subcategory_name, _ in entries)
+    dropped = set()
+    replaced_by: Dict[Tuple[str, str, str], List[str]] = {}
+    for members in clusters:
+        representative = entries[members[0]]
+        for i in members[1:]:
+            category_name, subcategory_name, keyword = entries[i]
+            if remaining[(category_name, subcategory_name)] == 1:
+                continue
+            remaining[(category_name, subcategory_name)] -= 1
+            dropped.add(i)
+            replaced_by.setdefault(representative, []).append(keyword)
+
+    base = config["collection_config"].get("number_of_images", 30)
+    max_factor = config.get("dedup_budget_factor", 2.0)
+    keyword_budgets: Dict[str, Dict[str, Dict[str, int]]] = {}
+    duplicates: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+    for (category_name, subcategory_name, keyword), replaced in replaced_by.items():
+        duplicates.setdefault(category_name, {}).setdefault(subcategory_name, {})[keyword] = replaced
+        if max_factor > 1:
+            keyword_budgets.setdefault(category_name, {}).setdefault(subcategory_name, {})[keyword] = round(
+                base * min(1 + len(replaced), max_factor)
+            )
+
+    deduped = {
+        category["name"]: {
+            subcategory_name: [] for subcategory_name in category_subcategory_keywords.get(category["name"], {})
+        }
+        for category in categories
+    }
+    for i, (category_name, subcategory_name, keyword) in enumerate(entries):
+        if i not in dropped:
+            deduped[category_name][subcategory_name].append(keyword)
+
+    logger.info(
+        "Keyword dedup: %d -> %d keywords in %d clusters, %d budgets raised",
+        len(entries),
+        len(entries) - len(dropped),
+        len(clusters),
+        len(replaced_by) if max_factor > 1 else 0
+    )
+    return deduped, keyword_budgets, duplicates
+
+
+def dedupe_keywords_node(state: PipelineState, runtime: Runtime[PipelineContext]) -> Dict[str, Any]:
+    category_subcategory_keywords, keyword_budgets, keyword_duplicates = dedupe_category_keywords(
+        state["categories"],
+        state["category_subcategory_keywords"],
+        runtime.context
+    )
+
+    return {
+        "category_subcategory_keywords": category_subcategory_keywords,
+        "keyword_budgets": keyword_budgets,
+        "keyword_duplicates": keyword_duplicates
+    }
@@ -1,16 +1,183 @@
 """Node for generating keywords."""
 import logging
-import time
-import os
-from ..core.state import PipelineState
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+from langgraph.runtime import Runtime
+from ..core.state import PipelineState, PipelineContext
+from ..core.cache import cache_writer, lookup_cached, stage_key
+from ..core.concurrency import call_options, latency_summary
 from ..agents import KeywordAgent
+from ..agents.keyword_agent import output_token_limit
 
 logger = logging.getLogger(__name__)
 
-API_DELAY_SECONDS = float(os.getenv("API_DELAY_SECONDS", "1.5"))
+
+def _generate_batched(
+    keyword_agent: KeywordAgent,
+    targets: List[Tuple[str, Dict[str, str]]],
+    pending: List[int],
+    keys: List[str],
+    batch_size: int,
+    country_or_culture: str,
+    config: Dict[str, Any],
+    call_latencies: List[float]
+) -> Tuple[Dict[int, List[str]], Dict[int, float]]:
+    """
+    Request the pending subcategories `batch_size` at a time, grouped by category.
+    Returns the keywords and the request latency for every subcategory that came back
+    valid; the latency of each request is appended to `call_latencies`. Valid answers are
+    written to the stage cache under the batch `keys` as each request completes.
+    """
+    by_category = defaultdict(list)
+    for i in pending:
+        by_category[targets[i][0]].append(i)
+    batches = [
+        (category_name, indices[start:start + batch_size])
+        for category_name, indices in by_category.items()
+        for start in range(0, len(indices), batch_size)
+    ]
+    
+    stage_cache = config.get("stage_cache")
+    
+    def _store(index: int, answer: Dict[str, List[str]]):
+        for i in batches[index][1]:
+            keywords = answer.get(targets[i][1]["name"])
+            if stage_cache and keywords:
+                stage_cache.set(keys[i], "keywords", keywords)
+    
+    batch_latencies = []
+    answers = keyword_agent.generate_keyword_batches(
+        [(category_name, [targets[i][1] for i in indices]) for category_name, indices in batches],
+        country_or_culture,
+        on_result=_store,
+        latencies=batch_latencies,
+        **call_options(config)
+    )
+    call_latencies.extend(batch_latencies)
+    
+    keywords, latencies = {}, {}
+    for (category_name, indices), answer, latency in zip(batches, answers, batch_latencies):
+        if isinstance(answer, Exception):
+            logger.error("Batched keyword request for '%s' failed: %s", category_name, answer)
+            continue
+        for i in indices:
+            subcategory_name = targets[i][1]["name"]
+            if subcategory_name in answer:
+                keywords[i] = answer[subcategory_name]
+                latencies[i] = latency
+    return keywords, latencies
 
 
-def generate_keywords_node(state: PipelineState) -> PipelineState:
+def generate_category_keywords(
+    categories: List[Dict[str, str]],
+    category_subcategories: Dict[str, List[Dict[str, str]]],
+    country_or_culture: str,
+    config: Dict[str, Any]
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Issue every (category, subcategory) request concurrently under the shared
+    `max_concurrency` budget and rate limiter from the config; failed subcategories
+    are retried individually. Subcategories answered from the stage cache are not requested.
+    
+    With `keyword_batch_size` above 1, subcategories of the same category are first
+    requested together, in batches sized to the model's output limit; any subcategory
+    missing from a batched answer falls back to its own request.
+    """
+    keyword_agent: KeywordAgent = config["agents"]["keyword_agent"]
+    stage_cache = config.get("stage_cache")
+    
+    targets = [
+        (category["name"], subcategory)
+        for category in categories
+        for subcategory in category_subcategories.get(category["name"], [])
+    ]
+    requests = [
+        {
+            "category_name": category_name,
+            "subcategory_name": subcategory["name"],
+            "subcategory_description": subcategory.get("description", ""),
+            "country_or_culture": country_or_culture
+        }
+        for category_name, subcategory in targets
+    ]
+    keys = [stage_key("keywords", request, keyword_agent.cache_identity) for request in requests]
+    results, pending = lookup_cached(stage_cache, keys)
+    
+    batch_size = keyword_agent.batch_size(config.get("keyword_batch_size", 1))
+    if batch_size > 1:
+        # A batched answer comes from a different prompt, so it is cached apart from single requests
+        batch_params = {"batch_size": batch_size, "output_token_limit": output_token_limit(keyword_agent.llm)}
+        batch_keys = [
+            stage_key("keywords", {**request, **batch_params}, keyword_agent.cache_identity) for request in requests
+        ]
+        batch_results, _ = lookup_cached(stage_cache, [batch_keys[i] for i in pending])
+        for i, keywords in zip(pending, batch_results):
+            results[i] = keywords
+        pending = [i for i in pending if results[i] is None]
+    if len(pending) < len(requests):
+        logger.info("Keywords cached for %d of %d subcategories", len(requests) - len(pending), len(requests))
+    
+    latencies = [0.0] * len(targets)
+    fresh_latencies = []
+    failed = 0
+    
+    if batch_size > 1 and len(pending) > 1:
+        batched, batched_latencies = _generate_batched(
+            keyword_agent, targets, pending, batch_keys, batch_size, country_or_culture, config, fresh_latencies
+        )
+        for i, keywords in batched.items():
+            results[i] = keywords
+            latencies[i] = batched_latencies[i]
+        pending = [i for i in pending if i not in batched]
+        if pending:
+            logger.info("Requesting %d subcategories missing from batched answers individually", len(pending))
+    
+    single_latencies = []
+    fresh = keyword_agent.generate_keywords_many(
+        [requests[i] for i in pending],
+        on_result=cache_writer(stage_cache, [keys[i] for i in pending], "keywords"),
+        latencies=single_latencies,
+        **call_options(config)
+    )
+    for i, keywords, latency in zip(pending, fresh, single_latencies):
+        results[i] = keywords
+        latencies[i] = latency
+        if isinstance(keywords, Exception):
+            failed += 1
+    fresh_latencies.extend(single_latencies)
+    
+    category_subcategory_keywords = {category["name"]: {} for category in categories}
+    for idx, ((category_name, subcategory), keywords, latency) in enumerate(zip(targets, results, latencies), 1):
+        subcategory_name = subcategory["name"]
+        if isinstance(keywords, Exception):
+            logger.error("Error generating keywords for '%s/%s': %s", category_name, subcategory_name, keywords)
+            keywords = []
+        
+        category_subcategory_keywords[category_name][subcategory_name] = keywords
+        logger.info(
+            "Generated %d keywords for subcategory '%s/%s' in %.2fs (%d/%d)",
+            len(keywords),
+            category_name,
+            subcategory_name,
+            latency,
+            idx,
+            len(targets)
+        )
+    
+    summary = latency_summary(fresh_latencies)
+    logger.info(
+        "Keyword calls: %d, latency p50=%.2fs p95=%.2fs max=%.2fs, failed=%d",
+        summary["count"],
+        summary["p50"],
+        summary["p95"],
+        summary["max"],
+        failed
+    )
+    
+    return category_subcategory_keywords
+
+
+def generate_keywords_node(state: PipelineState, runtime: Runtime[PipelineContext]) -> Dict[str, Any]:
     """
     Generate keywords for all subcategories.
     
@@ -22,47 +189,11 @@ def generate_keywords_node(state: PipelineState) -> PipelineState:
     """
     logger.info("Generating keywords for all subcategories...")
     
-    keyword_agent: KeywordAgent = state["config"]["agents"]["keyword_agent"]
-    
-    category_subcategory_keywords = {}
-    total_subcategories = sum(len(subs) for subs in state["category_subcategories"].values())
-    processed_count = 0
+    category_subcategory_keywords = generate_category_keywords(
+        state["categories"],
+        state["category_subcategories"],
+        state.get("original_context", state["free_text"]),
+        runtime.context
+    )
     
-    for category in state["categories"]:
-        category_name = category["name"]
-        category_subcategory_keywords[category_name] = {}
-        
-        subcategories = state["category_subcategories"].get(category_name, [])
-        
-        for subcategory in subcategories:
-            subcategory_name = subcategory["name"]
-            subcategory_desc = subcategory.get("description", "")
-            
-            processed_count += 1
-            if processed_count > 1:
-                time.sleep(API_DELAY_SECONDS)
-            
-            country_or_culture = state.get("original_context", state["free_text"])
-            
-            keywords = keyword_agent.generate_keywords(
-                category_name=category_name,
-                subcategory_name=subcategory_name,
-                subcategory_description=subcategory_desc,
-                country_or_culture=country_or_culture
-            )
-            
-            category_subcategory_keywords[category_name][subcategory_name] = keywords
-            logger.info(
-                "Generated %d keywords for subcategory '%s/%s' (%d/%d)",
-                len(keywords),
-                category_name,
-                subcategory_name,
-                processed_count,
-                total_subcategories
-            )
-    
-    return {
-        **state,
-        "category_subcategory_keywords": category_subcategory_keywords
-    }
-
+    return {"category_subcategory_keywords": category_subcategory_keywords}
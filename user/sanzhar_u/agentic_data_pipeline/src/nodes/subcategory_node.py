@@ -1,41 +1,66 @@
 import logging
-import time
-import os
-from ..core.state import PipelineState
+from typing import Any, Dict, List
+from langgraph.runtime import Runtime
+from ..core.state import PipelineState, PipelineContext
+from ..core.cache import cache_writer, lookup_cached, stage_key
+from ..core.concurrency import call_options
 from ..agents import SubcategoryAgent
 
 logger = logging.getLogger(__name__)
 
-API_DELAY_SECONDS = float(os.getenv("API_DELAY_SECONDS", "1.5"))
 
-
-def generate_subcategories_node(state: PipelineState) -> PipelineState:
-    logger.info("Generating subcategories for %d categories...", len(state["categories"]))
+def generate_category_subcategories(
+    categories: List[Dict[str, str]],
+    country_or_culture: str,
+    config: Dict[str, Any]
+) -> Dict[str, List[Dict[str, str]]]:
+    subcategory_agent: SubcategoryAgent = config["agents"]["subcategory_agent"]
+    stage_cache = config.get("stage_cache")
     
-    subcategory_agent: SubcategoryAgent = state["config"]["agents"]["subcategory_agent"]
+    requests = [
+        {
+            "category_name": category["name"],
+            "category_description": category.get("description", ""),
+            "country_or_culture": country_or_culture
+        }
+        for category in categories
+    ]
+    keys = [stage_key("subcategories", request, subcategory_agent.cache_identity) for request in requests]
+    results, pending = lookup_cached(stage_cache, keys)
+    if len(pending) < len(requests):
+        logger.info("Subcategories cached for %d of %d categories", len(requests) - len(pending), len(requests))
     
-    category_subcategories = {}
-    country_or_culture = state.get("original_context", state["free_text"])
+    # Each answer is cached as it arrives, so an interrupted stage keeps what it already received
+    fresh = subcategory_agent.generate_subcategories_many(
+        [requests[i] for i in pending],
+        on_result=cache_writer(stage_cache, [keys[i] for i in pending], "subcategories"),
+        **call_options(config)
+    )
+    for i, subcategories in zip(pending, fresh):
+        results[i] = subcategories
     
-    for idx, category in enumerate(state["categories"], 1):
+    # Results come back in call order, so the merge keeps category order
+    category_subcategories = {}
+    for idx, (category, subcategories) in enumerate(zip(categories, results), 1):
         category_name = category["name"]
-        category_desc = category.get("description", "")
-        
-        if idx > 1:
-            time.sleep(API_DELAY_SECONDS)
-        
-        subcategories = subcategory_agent.generate_subcategories(
-            category_name=category_name,
-            category_description=category_desc,
-            country_or_culture=country_or_culture
-        )
+        if isinstance(subcategories, Exception):
+            logger.error("Error generating subcategories for category '%s': %s", category_name, subcategories)
+            subcategories = []
         
         category_subcategories[category_name] = subcategories
         logger.info("Generated %d subcategories for category '%s' (%d/%d)", 
-                   len(subcategories), category_name, idx, len(state["categories"]))
+                   len(subcategories), category_name, idx, len(categories))
     
-    return {
-        **state,
-        "category_subcategories": category_subcategories
-    }
+    return category_subcategories
+
 
+def generate_subcategories_node(state: PipelineState, runtime: Runtime[PipelineContext]) -> Dict[str, Any]:
+    logger.info("Generating subcategories for %d categories...", len(state["categories"]))
+    
+    category_subcategories = generate_category_subcategories(
+        state["categories"],
+        state.get("original_context", state["free_text"]),
+        runtime.context
+    )
+    
+    return {"category_subcategories": category_subcategories}
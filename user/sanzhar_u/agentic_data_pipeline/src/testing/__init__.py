@@ -0,0 +1,4 @@
+from .fake_llm import FakeChatModel
+from .fake_collector import FakeImageCollector, LocalImageServer, generate_image
+
+__all__ = ["FakeChatModel", "FakeImageCollector", "LocalImageServer", "generate_image"]
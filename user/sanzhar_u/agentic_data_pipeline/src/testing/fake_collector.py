@@ -0,0 +1,196 @@
+import io
+import os
+import time
+import random
+import hashlib
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+from ..collectors.base_collector import BaseCollector
+from ..collectors.image_collector import IMAGE_EXTENSIONS
+from ..collectors.image_downloader import DownloadLoop, ImageDownloader
+
+
+@lru_cache(maxsize=1024)
+def generate_image(width: int, height: int, seed: int) -> bytes:
+    """A JPEG of random 8x8 blocks scaled up, so images of different seeds do not share a perceptual hash."""
+    rng = random.Random(seed)
+    blocks = Image.frombytes("RGB", (8, 8), bytes(rng.randrange(256) for _ in range(8 * 8 * 3)))
+    buffer = io.BytesIO()
+    blocks.resize((width, height), Image.NEAREST).save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+class LocalImageServer:
+    """
+    HTTP server on a background thread serving generated images at
+    `/<width>/<height>/<seed>.jpg`, each response delayed by `latency` seconds.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so pooled clients reuse their connections as they would with a real host;
+            # headers and body go out in separate writes, which Nagle would hold back on a kept-alive socket
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+            def do_GET(self):
+                try:
+                    width, height, name = self.path.strip("/").split("/")
+                    data = generate_image(int(width), int(height), int(name.split(".")[0]))
+                except ValueError:
+                    self.send_error(404)
+                    return
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        class Server(ThreadingHTTPServer):
+            # The socketserver default of 5 drops connections beyond it, which clients only retry after a second
+            request_queue_size = 128
+
+        self._httpd = Server((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="local-image-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, width: int, height: int, seed: int) -> str:
+        return f"{self.base_url}/{width}/{height}/{seed}.jpg"
+
+    def start(self) -> "LocalImageServer":
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "LocalImageServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
+
+
+class FakeImageCollector(BaseCollector):
+    """
+    Collector that skips the browser: every keyword gets `number_of_images` URLs on a
+    LocalImageServer, fetched through the real ImageDownloader on one DownloadLoop shared
+    by all keywords, as ImageCollector does. The seeds come from the keyword, so reruns
+    download the same images.
+
+    The server is a single host standing in for the many hosts of real search results,
+    so its per-host limit is `per_host_limit` rather than the scraper's default.
+    """
+
+    def __init__(
+        self,
+        server: LocalImageServer,
+        image_size: Tuple[int, int] = (640, 480),
+        discovery_latency: float = 0.0,
+        per_host_limit: int = 64
+    ):
+        self.server = server
+        self.image_size = image_size
+        # Stands in for the time a browser spends finding the URLs
+        self.discovery_latency = discovery_latency
+        self.per_host_limit = per_host_limit
+        self._download_loop: Optional[DownloadLoop] = None
+        self._lock = threading.Lock()
+
+    def _get_download_loop(self, config: Dict[str, Any]) -> DownloadLoop:
+        with self._lock:
+            if self._download_loop is None:
+                self._download_loop = DownloadLoop(
+                    clients=config.get("browser_pool_size", 2),
+                    connections_per_client=config.get("download_concurrency", 8),
+                    per_host_limit=self.per_host_limit
+                ).start()
+            return self._download_loop
+
+    def is_complete(self, keyword: str, output_path: str, config: Dict[str, Any]) -> bool:
+        keyword_path = os.path.join(output_path, keyword)
+        if not os.path.isdir(keyword_path):
+            return False
+        with os.scandir(keyword_path) as entries:
+            existing = sum(1 for entry in entries if entry.name.lower().endswith(IMAGE_EXTENSIONS))
+        return existing >= config.get("number_of_images", 30)
+
+    def collect(
+        self,
+        keyword: str,
+        output_path: str,
+        config: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return self.start_collect(keyword, output_path, config, metadata)()
+
+    def start_collect(
+        self,
+        keyword: str,
+        output_path: str,
+        config: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Callable[[], Dict[str, Any]]:
+        """Returns after the simulated discovery, like ImageCollector releasing its browser; downloads finish in the returned function."""
+        image_path = os.path.join(output_path, keyword)
+        os.makedirs(image_path, exist_ok=True)
+        if self.discovery_latency:
+            time.sleep(self.discovery_latency)
+
+        number_of_images = config.get("number_of_images", 30)
+        if number_of_images <= 0:
+            empty = {"success": True, "keyword": keyword, "items_collected": 0, "output_path": image_path, "urls_found": 0}
+            return lambda: empty
+
+        base_seed = int.from_bytes(hashlib.sha256(keyword.encode("utf-8")).digest()[:4], "big")
+        downloader = ImageDownloader(
+            image_path=image_path,
+            search_key=keyword,
+            min_resolution=config.get("min_resolution", (0, 0)),
+            max_resolution=config.get("max_resolution", (8000, 8000)),
+            concurrency=config.get("download_concurrency", 8),
+            download_loop=self._get_download_loop(config)
+        ).start()
+        for index in range(number_of_images):
+            downloader.submit(index, self.server.url(*self.image_size, base_seed + index))
+
+        def finish() -> Dict[str, Any]:
+            stats = downloader.close()
+            return {
+                "success": True,
+                "keyword": keyword,
+                "items_collected": stats["saved"],
+                "output_path": image_path,
+                "urls_found": stats["total"],
+                "skipped": stats["skipped"],
+                "duplicates": stats["duplicates"]
+            }
+
+        return finish
+
+    def close(self):
+        with self._lock:
+            if self._download_loop is not None:
+                self._download_loop.close()
+                self._download_loop = None
@@ -0,0 +1,142 @@
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import Field, PrivateAttr
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_SYLLABLES = [
+    "ka", "za", "qa", "tu", "ra", "mi", "so", "ne", "bel", "dar", "kum", "tal",
+    "ys", "or", "ai", "sha", "zhe", "ul", "ter", "mon", "ak", "es", "gul", "nur"
+]
+
+
+def _stable_seed(*parts: Any) -> int:
+    return int.from_bytes(hashlib.sha256("\0".join(map(str, parts)).encode("utf-8")).digest()[:8], "big")
+
+
+def _field(text: str, label: str) -> str:
+    return text.split(f"{label}: ", 1)[1].split("\n", 1)[0] if f"{label}: " in text else ""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the pipeline's chat model. Recorded responses, keyed by the
+    last message, are replayed as-is; any other prompt from the category, subcategory
+    or keyword agent gets synthetic JSON of the configured size.
+
+    Answers and latencies are derived from the prompt and `seed` only, so a run gives
+    the same output regardless of concurrency or call order.
+    """
+
+    categories: int = 4
+    subcategories: int = 3
+    keywords: int = 8
+    # Mean seconds per call; "uniform" spreads it over [0, 2 * latency], "lognormal" uses latency_sigma
+    latency: float = 0.0
+    latency_distribution: Literal["fixed", "uniform", "lognormal"] = "fixed"
+    latency_sigma: float = 0.5
+    seed: int = 0
+    recordings: Dict[str, str] = Field(default_factory=dict)
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    _latency_total: float = PrivateAttr(default=0.0)
+
+    @classmethod
+    def from_recordings(cls, path: str, **kwargs: Any) -> "FakeChatModel":
+        """Load a JSONL file of {"prompt": ..., "response": ...} lines."""
+        recordings = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    recordings[record["prompt"]] = record["response"]
+        return cls(recordings=recordings, **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"categories": self.categories, "subcategories": self.subcategories, "keywords": self.keywords, "seed": self.seed}
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Calls answered and the simulated latency they added up to."""
+        with self._lock:
+            return {"calls": self._calls, "latency_total": self._latency_total}
+
+    def _sample_latency(self, prompt: str) -> float:
+        if self.latency <= 0:
+            return 0.0
+        rng = random.Random(_stable_seed(self.seed, "latency", prompt))
+        if self.latency_distribution == "uniform":
+            return rng.uniform(0, 2 * self.latency)
+        if self.latency_distribution == "lognormal":
+            # Scaled so the mean stays at `latency`
+            return rng.lognormvariate(0, self.latency_sigma) * self.latency / math.exp(self.latency_sigma ** 2 / 2)
+        return self.latency
+
+    def _words(self, rng: random.Random, count: int) -> str:
+        return " ".join(
+            "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3)))
+            for _ in range(count)
+        )
+
+    def _keyword_list(self, category: str, subcategory: str) -> List[str]:
+        rng = random.Random(_stable_seed(self.seed, "keywords", category, subcategory))
+        return [self._words(rng, rng.randint(2, 4)) for _ in range(self.keywords)]
+
+    def _synthetic(self, prompt: str) -> Dict[str, Any]:
+        if "EACH of the following subcategories" in prompt:
+            category = _field(prompt, "Category")
+            names = [part.split("\n", 1)[0] for part in prompt.split("Subcategory: ")[1:]]
+            return {"subcategories": [{"name": name, "keywords": self._keyword_list(category, name)} for name in names]}
+        if "Subcategory: " in prompt:
+            return {"keywords": self._keyword_list(_field(prompt, "Category"), _field(prompt, "Subcategory"))}
+        if "Category: " in prompt:
+            category = _field(prompt, "Category")
+            return {"subcategories": [
+                {"name": f"{category} {i + 1}", "description": f"Synthetic subcategory {i + 1} of {category}"}
+                for i in range(self.subcategories)
+            ]}
+        rng = random.Random(_stable_seed(self.seed, "categories", prompt))
+        return {"categories": [
+            {"name": f"{self._words(rng, 1).title()} {i + 1}", "description": f"Synthetic category {i + 1}"}
+            for i in range(self.categories)
+        ]}
+
+    def _answer(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = messages[-1].text
+        content = self.recordings.get(prompt)
+        if content is None:
+            content = json.dumps(self._synthetic(prompt), ensure_ascii=False)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _account(self, prompt: str) -> float:
+        delay = self._sample_latency(prompt)
+        with self._lock:
+            self._calls += 1
+            self._latency_total += delay
+        return delay
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay = self._account(messages[-1].text)
+        if delay:
+            time.sleep(delay)
+        return self._answer(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay = self._account(messages[-1].text)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._answer(messages)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Offline pipeline benchmark: FakeChatModel and FakeImageCollector stand in for the LLM
+provider and the browser, so runs need no API key or network.
+
+For every size it reports
+  - orchestration overhead: wall time with zero-latency fakes, i.e. graph steps,
+    state merges, checkpoints, events and dedup, without any model or download wait
+  - concurrency scaling: wall time with simulated LLM and download latency at each
+    concurrency level, applied to both max_concurrency and browser_pool_size
+  - peak Python memory (tracemalloc), from a separate run of the overhead setup since
+    tracing slows the interpreter down
+
+Use --images-per-keyword 0 to leave the downloader out and time the graph alone.
+
+Example:
+    python tests/benchmark_pipeline.py --sizes 10,100,1000,10000 --latency 0.2 --concurrency 1,8,32
+"""
+import os
+import sys
+import json
+import time
+import math
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path so we can import from src
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import PipelineConfig
+from src.core import PipelineBuilder
+from src.core.checkpoint import create_sqlite_checkpointer
+from src.nodes import (
+    extract_categories_node,
+    generate_subcategories_node,
+    generate_keywords_node,
+    dedupe_keywords_node,
+    collect_data_node,
+    collection_pending,
+    dispatch_categories,
+    process_category_node
+)
+from src.testing import FakeChatModel, FakeImageCollector, LocalImageServer
+
+
+def shape_for(keywords: int, keywords_per_subcategory: int = 10):
+    """(categories, subcategories per category, keywords per subcategory) giving about `keywords` keywords."""
+    per_subcategory = min(keywords_per_subcategory, keywords)
+    subcategories_total = max(1, math.ceil(keywords / per_subcategory))
+    categories = max(1, round(math.sqrt(subcategories_total)))
+    return categories, math.ceil(subcategories_total / categories), per_subcategory
+
+
+def run_once(args, server: LocalImageServer, keywords: int, latency: float, concurrency: int, measure_memory: bool):
+    server.latency = args.download_latency if latency else 0.0
+    categories, subcategories, per_subcategory = shape_for(keywords)
+    llm = FakeChatModel(
+        categories=categories,
+        subcategories=subcategories,
+        keywords=per_subcategory,
+        latency=latency,
+        latency_distribution=args.latency_distribution,
+        seed=args.seed
+    )
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        collector = FakeImageCollector(server, image_size=(args.image_size, args.image_size))
+        config = PipelineConfig(
+            llm=llm,
+            collector=collector,
+            collection_config={
+                "data_path": data_dir,
+                "number_of_images": args.images_per_keyword,
+                "browser_pool_size": concurrency,
+                "download_concurrency": 8,
+                "skip_complete": False
+            },
+            max_concurrency=concurrency,
+            requests_per_minute=1e9,
+            max_retries=0,
+            keyword_batch_size=args.keyword_batch_size,
+            keyword_dedup=not args.no_dedup
+        )
+        checkpointer = create_sqlite_checkpointer(os.path.join(data_dir, "checkpoints.sqlite")) if args.checkpoint else None
+
+        builder = PipelineBuilder(config.to_dict(), checkpointer=checkpointer)
+        builder.set_entry_point("extract_categories")
+        builder.add_node("extract_categories", extract_categories_node)
+        if args.fan_out:
+            builder.add_fan_out("process_category", process_category_node, dispatch_categories)
+            builder.connect_to_end("process_category")
+        else:
+            builder.add_node("generate_subcategories", generate_subcategories_node)
+            builder.add_node("generate_keywords", generate_keywords_node)
+            if not args.no_dedup:
+                builder.add_node("dedupe_keywords", dedupe_keywords_node)
+            builder.add_loop("collect_data", collect_data_node, collection_pending)
+        workflow = builder.build()
+
+        if measure_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        events = 0
+        state = None
+        for event in workflow.stream(builder.create_initial_state(free_text="Benchmark"), thread_id="benchmark"):
+            events += 1
+            if event.state is not None:
+                state = event.state
+        wall = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if measure_memory else 0
+        if measure_memory:
+            tracemalloc.stop()
+
+        config.collection_executor.close()
+        if checkpointer is not None:
+            checkpointer.conn.close()
+        results = state["collection_results"]
+        return {
+            "keywords": len(results),
+            "concurrency": concurrency,
+            "latency": latency,
+            "wall_s": round(wall, 3),
+            "llm_calls": config.llm.stats["calls"],
+            "llm_latency_total_s": round(config.llm.stats["latency_total"], 3),
+            "items": sum(r.get("items_collected", 0) for r in results),
+            "events": events,
+            "overhead_per_keyword_ms": round(wall / max(1, len(results)) * 1000, 3),
+            "peak_memory_mb": round(peak / 2 ** 20, 1) if measure_memory else None
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma-separated keyword counts")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean simulated LLM latency for scaling runs, seconds")
+    parser.add_argument("--download-latency", type=float, default=0.02, help="Seconds per image request for scaling runs")
+    parser.add_argument("--latency-distribution", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels for scaling runs")
+    parser.add_argument("--images-per-keyword", type=int, default=1)
+    parser.add_argument("--image-size", type=int, default=256)
+    parser.add_argument("--keyword-batch-size", type=int, default=8)
+    parser.add_argument("--fan-out", action="store_true")
+    parser.add_argument("--no-dedup", action="store_true")
+    parser.add_argument("--checkpoint", action="store_true", help="Checkpoint to SQLite as main.py does")
+    parser.add_argument("--skip-scaling", action="store_true")
+    parser.add_argument("--skip-memory", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the rows as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+
+    rows = []
+    with LocalImageServer() as server:
+        # Warm-up so lazy imports and first-call setup stay out of the first measurement
+        run_once(args, server, 10, 0.0, 1, measure_memory=False)
+        for size in sizes:
+            row = run_once(args, server, size, 0.0, max(concurrency_levels), measure_memory=False)
+            row["run"] = "overhead"
+            if not args.skip_memory:
+                row["peak_memory_mb"] = run_once(args, server, size, 0.0, max(concurrency_levels), measure_memory=True)["peak_memory_mb"]
+            rows.append(row)
+            print(
+                f"[overhead] {row['keywords']:>6} keywords: {row['wall_s']:>8.2f}s wall, "
+                f"{row['overhead_per_keyword_ms']:>7.2f} ms/keyword, {row['llm_calls']} LLM calls, "
+                f"{row['items']} images, peak {row['peak_memory_mb']} MB"
+            )
+            if args.skip_scaling:
+                continue
+            baseline = None
+            for level in concurrency_levels:
+                row = run_once(args, server, size, args.latency, level, measure_memory=False)
+                row["run"] = "scaling"
+                baseline = baseline or row["wall_s"]
+                row["speedup"] = round(baseline / row["wall_s"], 2) if row["wall_s"] else None
+                rows.append(row)
+                print(
+                    f"[scaling ] {row['keywords']:>6} keywords, concurrency {level:>3}: {row['wall_s']:>8.2f}s wall, "
+                    f"{row['llm_latency_total_s']:.1f}s simulated LLM time, speedup x{row['speedup']}"
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,14 @@ from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 from src.agents import CategoryAgent
+from src.core.llm_cache import configure_llm_cache_from_env
 
 
 def get_llm():
     """Get LLM instance from environment."""
+    # With LLM_CACHE_PATH set, repeated prompts are answered from the recorded cache
+    configure_llm_cache_from_env()
+    
     provider = os.getenv("LLM_PROVIDER", "google")
     model = os.getenv("LLM_MODEL")
     api_key = os.getenv("LLM_API_KEY")
@@ -10,11 +10,12 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from dotenv import load_dotenv
+from langgraph.runtime import Runtime
 load_dotenv(dotenv_path=project_root / ".env")
 
 # Import from main.py
 from main import create_graph, get_llm
-from src.core.state import PipelineState
+from src.core.state import PipelineState, PipelineContext
 
 # Import nodes to create wrapper versions
 from src.nodes.category_node import extract_categories_node
@@ -22,13 +23,13 @@ from src.nodes.subcategory_node import generate_subcategories_node
 from src.nodes.keyword_node import generate_keywords_node
 
 
-def limited_subcategories_node(state: PipelineState) -> PipelineState:
+def limited_subcategories_node(state: PipelineState, runtime: Runtime[PipelineContext]) -> PipelineState:
     """
     Wrapper around generate_subcategories_node that limits to only 1 subcategory per category.
     Note: Categories should already be limited to 3 before calling this.
     """
-    # Generate subcategories for all categories
-    state = generate_subcategories_node(state)
+    # Generate subcategories for all categories (nodes return only the keys they change)
+    state = {**state, **generate_subcategories_node(state, runtime)}
     
     # Limit to 1 subcategory per category
     limited_subcategories = {}
@@ -80,7 +81,9 @@ def main():
             headless=True,
             min_resolution=(100, 100),
             max_resolution=(200, 200),
-            max_missed=1
+            max_missed=1,
+            # Set to replay recorded LLM responses instead of calling the provider
+            llm_cache_path=os.getenv("LLM_CACHE_PATH")
         )
         print("✓ Pipeline graph created")
     except Exception as e:
@@ -91,6 +94,8 @@ def main():
     
     # Create initial state
     initial_state = builder.create_initial_state(free_text=country)
+    # Nodes read agents and collector from the runtime context, as they do inside the graph
+    runtime = Runtime(context=config.to_dict())
     print(f"✓ Initial state created with input: {country}")
     
     # Run workflow step by step to allow limiting
@@ -100,7 +105,7 @@ def main():
     
     try:
         # Run category extraction
-        state_after_categories = extract_categories_node(initial_state)
+        state_after_categories = {**initial_state, **extract_categories_node(initial_state, runtime)}
         
         # Limit to 3 categories
         if len(state_after_categories["categories"]) > 3:
@@ -124,7 +129,7 @@ def main():
     print("=" * 70)
     
     try:
-        state_after_subcategories = limited_subcategories_node(state_after_categories)
+        state_after_subcategories = limited_subcategories_node(state_after_categories, runtime)
         
         total_subcategories = sum(len(subs) for subs in state_after_subcategories["category_subcategories"].values())
         print(f"\n✓ Generated {total_subcategories} subcategories (1 per category):")
@@ -145,7 +150,7 @@ def main():
     print("=" * 70)
     
     try:
-        state_after_keywords = generate_keywords_node(state_after_subcategories)
+        state_after_keywords = {**state_after_subcategories, **generate_keywords_node(state_after_subcategories, runtime)}
         
         total_keywords = sum(
             len(keywords)
@@ -168,6 +173,24 @@ def main():
         traceback.print_exc()
         sys.exit(1)
     
+    # Step 4: Run the compiled graph the way LangGraph Studio does, without passing a context
+    print("\n" + "=" * 70)
+    print("STEP 4: Invoking the Graph Without a Context (first node only)")
+    print("=" * 70)
+    
+    try:
+        # Leaving the stream after the first update stops the graph before collection starts
+        for update in graph.stream(initial_state, stream_mode="updates"):
+            studio_categories = update["extract_categories"]["categories"]
+            break
+        print(f"\n✓ Graph ran without a context and extracted {len(studio_categories)} categories")
+    
+    except Exception as e:
+        print(f"✗ Error invoking graph without a context: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    
     # Summary
     print("\n" + "=" * 70)
     print("PIPELINE TEST SUMMARY")
@@ -1,9 +1,20 @@
 import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
 import requests
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+import pyarrow as pa
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
 import pandas as pd
-from datasets import load_dataset, DatasetDict, load_from_disk
+from datasets import load_dataset, Dataset, DatasetDict, concatenate_datasets, load_from_disk
 from datetime import datetime
 
 
@@ -27,74 +38,399 @@ headers = {
     "Authorization": lingvanex
 }
 
+SOURCE_LANG = "en_GB"
+TARGET_LANG = "kk_KZ"
+TM_PATH = "translation_memory.sqlite"
+SPLITS = ['test', 'validation', 'dev']
+MAX_IN_FLIGHT = 8
+BATCH_SIZE = 64
+BATCH_MAX_CHARS = 8000
+TRANSLATION_ERROR = "Translation Error"
+SHARD_DIR = "translated_mmlu_shards"
+SHARD_SIZE = 1000
+MAX_RETRIES = 2
+SHARD_SCHEMA = pa.schema([
+    ("question", pa.string()),
+    ("subject", pa.string()),
+    ("choices", pa.list_(pa.string())),
+    ("answer", pa.int64()),
+    ("id", pa.int64())
+])
 
-def lingvanex_request(text: str) -> str:
+
+def create_session(pool_size: int = MAX_IN_FLIGHT) -> requests.Session:
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["POST"]
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.headers.update(headers)
+    return session
+
+
+session = create_session()
+
+
+def lingvanex_request(text):
+    """Translate a string, or a list of strings in a single request (the API accepts both)."""
     payload = {
-        "from": "en_GB",
-        "to": "kk_KZ",
+        "from": SOURCE_LANG,
+        "to": TARGET_LANG,
         "data": text,
         "platform": "api"
     }
-    response = requests.post(url, json=payload, headers=headers)
+    response = session.post(url, json=payload)
     try:
         return json.loads(response.text)['result']
     except (json.JSONDecodeError, KeyError) as e:
         logging.error(f"Failed to parse response for text: '{text}' | Error: {e}")
-        return "Translation Error"
+        return TRANSLATION_ERROR
 
 
-def translate_dataset(ds):
-    translated_data = {
-        'test': [],
-        'validation': [],
-        'dev': []
-    }
-    for split in ['test', 'validation', 'dev']:
-        logging.info(f"Starting translation for the {split} set...")
-        for idx, obj in enumerate(tqdm(ds[split], desc=f"Processing {split} set")):
-            subject = obj['subject']
+def translate_batch(texts: List[str]) -> List[str]:
+    result = lingvanex_request(texts)
+    if isinstance(result, list) and len(result) == len(texts):
+        return result
+    # A single bad segment fails the whole request, so isolate it by falling back to one request per segment
+    logging.warning(f"Batch of {len(texts)} segments failed, translating one by one")
+    return [lingvanex_request(text) for text in texts]
+
+
+def normalize_segment(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationMemory:
+    """Persistent SQLite store of translations keyed by (source lang, target lang, normalized text)."""
+
+    def __init__(self, path: str = TM_PATH, source_lang: str = SOURCE_LANG, target_lang: str = TARGET_LANG):
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (source_lang, target_lang, source_text)
+            )
+        """)
+        self.conn.commit()
+
+    def lookup(self, texts: Iterable[str]) -> Dict[str, str]:
+        texts = list(texts)
+        found = {}
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(texts), 500):
+                chunk = texts[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT source_text, translation FROM translations "
+                    f"WHERE source_lang = ? AND target_lang = ? AND source_text IN ({','.join('?' * len(chunk))})",
+                    [self.source_lang, self.target_lang, *chunk]
+                )
+                found.update(rows)
+        return found
+
+    def store(self, translations: Dict[str, str]):
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                [(self.source_lang, self.target_lang, text, translation) for text, translation in translations.items()]
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def make_batches(segments: List[str], batch_size: int = BATCH_SIZE, max_chars: int = BATCH_MAX_CHARS) -> List[List[int]]:
+    """Pack segment indices into requests bounded by segment count and total characters."""
+    batches, current, chars = [], [], 0
+    for idx, text in enumerate(segments):
+        if current and (len(current) >= batch_size or chars + len(text) > max_chars):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(idx)
+        chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def translate_segments(
+    segments: List[str],
+    max_in_flight: int = MAX_IN_FLIGHT,
+    desc: str = "Translating",
+    on_batch: Optional[Callable[[List[str], List[str]], None]] = None
+) -> List[str]:
+    """
+    Translate segments with at most `max_in_flight` concurrent requests, preserving input order.
+    `on_batch(sources, translations)` is called as each request completes.
+    """
+    translated = [TRANSLATION_ERROR] * len(segments)
+    batches = make_batches(segments)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        futures = {
+            executor.submit(translate_batch, [segments[i] for i in batch]): batch
+            for batch in batches
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+            batch = futures[future]
             try:
-                translated_question = lingvanex_request(obj['question'])
-                translated_choices = [lingvanex_request(choice) for choice in obj['choices']]
-                
-                translated_data[split].append({
-                    'question': translated_question,
-                    'subject': subject,
-                    'choices': translated_choices,
-                    'answer': obj['answer'],
-                    'id': idx
-                })
+                result = future.result()
+                for idx, text in zip(batch, result):
+                    translated[idx] = text
+                if on_batch:
+                    on_batch([segments[i] for i in batch], result)
             except Exception as e:
-                logging.error(f"Error in subject '{subject}' (question ID: {idx}): {e}")
+                logging.error(f"Batch starting at segment {batch[0]} failed: {e}")
 
-    translated_dataset_dict = DatasetDict({
-        split: ds[split].from_list(translated_data[split])
-        for split in ['test', 'validation', 'dev']
-    })
+    return translated
 
-    return translated_dataset_dict
 
+def translate_unique(
+    segments: List[str],
+    tm: TranslationMemory,
+    max_retries: int = MAX_RETRIES,
+    on_translated: Optional[Callable[[Dict[str, str]], None]] = None
+) -> Dict[str, str]:
+    """
+    Translate the corpus-wide unique normalized segments, consulting and filling the translation memory.
+    Every completed request is committed to the memory immediately, so an interrupted run loses at most
+    the requests in flight. Failed segments are retried up to `max_retries` more times.
+    `on_translated(translations)` receives the memory hits first and then every completed request.
+    """
+    unique = list(dict.fromkeys(normalize_segment(text) for text in segments))
+    known = tm.lookup(unique)
+    misses = [text for text in unique if text not in known]
+    if on_translated and known:
+        on_translated(dict(known))
 
-def save_to_excel(translated_data, ds):
-    rows = []
-    for split, data in translated_data.items():
-        for entry in data:
-            row = {
-                "Split": split,
-                "Subject": entry["subject"],
-                "Question ID": entry["id"],
-                "Original Question": ds[split][entry['id']]["question"],
-                "Translated Question": entry["question"]
+    logging.info(
+        f"Translation memory: {len(known)}/{len(unique)} unique segments hit "
+        f"({len(known) / max(len(unique), 1):.1%}), {len(misses)} to translate"
+    )
+
+    def commit(sources: List[str], translations: List[str]):
+        done = {
+            text: translation for text, translation in zip(sources, translations)
+            if translation != TRANSLATION_ERROR
+        }
+        tm.store(done)
+        if on_translated and done:
+            on_translated(done)
+
+    n_requests = 0
+    pending = misses
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        if attempt:
+            logging.warning(f"Retrying {len(pending)} failed segments (attempt {attempt}/{max_retries})")
+        n_requests += len(make_batches(pending))
+        result = translate_segments(pending, desc="Translating unique segments", on_batch=commit)
+        known.update((text, translation) for text, translation in zip(pending, result) if translation != TRANSLATION_ERROR)
+        pending = [text for text, translation in zip(pending, result) if translation == TRANSLATION_ERROR]
+
+    if pending:
+        logging.error(f"{len(pending)} unique segments are still untranslated after {max_retries} retries")
+    logging.info(
+        f"Sent {n_requests} requests for {len(segments)} segments; "
+        f"{len(segments) - n_requests} API calls saved versus one call per segment"
+    )
+    return known
+
+
+def load_manifest(shard_dir: str, ds) -> dict:
+    path = os.path.join(shard_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["shard_size"] != SHARD_SIZE:
+            raise ValueError(f"{path} was written with shard_size={manifest['shard_size']}, expected {SHARD_SIZE}")
+        logging.info(f"Resuming from {path}")
+        return manifest
+    return {
+        "shard_size": SHARD_SIZE,
+        "splits": {
+            split: {"num_rows": ds[split].num_rows, "completed": []}
+            for split in SPLITS
+        }
+    }
+
+
+def save_manifest(shard_dir: str, manifest: dict):
+    path = os.path.join(shard_dir, "manifest.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def shard_path(shard_dir: str, split: str, shard_id: int) -> str:
+    return os.path.join(shard_dir, split, f"shard-{shard_id:05d}.arrow")
+
+
+def write_shard(path: str, rows: List[dict]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pylist(rows, schema=SHARD_SCHEMA)
+    # Arrow stream format is what Dataset.from_file memory-maps
+    with pa.OSFile(path + ".tmp", "wb") as sink, pa.ipc.new_stream(sink, SHARD_SCHEMA) as writer:
+        writer.write_table(table)
+    os.replace(path + ".tmp", path)
+
+
+def pending_shards(manifest: dict) -> Dict[str, List[int]]:
+    pending = {}
+    for split in SPLITS:
+        info = manifest["splits"][split]
+        n_shards = -(-info["num_rows"] // manifest["shard_size"])
+        completed = set(info["completed"])
+        pending[split] = [i for i in range(n_shards) if i not in completed]
+    return pending
+
+
+def load_shards(shard_dir: str, manifest: dict) -> DatasetDict:
+    splits = {}
+    for split in SPLITS:
+        completed = sorted(manifest["splits"][split]["completed"])
+        shards = [Dataset.from_file(shard_path(shard_dir, split, i)) for i in completed]
+        splits[split] = concatenate_datasets(shards) if shards else Dataset(SHARD_SCHEMA.empty_table())
+    return DatasetDict(splits)
+
+
+def translate_dataset(ds, tm_path: str = TM_PATH, shard_dir: str = SHARD_DIR):
+    """
+    Translate every split into sharded Arrow files under `shard_dir`, tracked by manifest.json.
+    Each shard is written as soon as all of its segments are in the translation memory, while the
+    rest of the corpus is still translating. Shards with segments that still fail after the retries
+    stay pending in the manifest and are picked up again by the next run. Returns the memory-mapped shards.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest = load_manifest(shard_dir, ds)
+    pending = pending_shards(manifest)
+
+    # Corpus-wide unique segments of everything not yet written, so the memory dedups across splits
+    columns = {split: ds[split].select_columns(['question', 'subject', 'choices', 'answer']).to_dict() for split in SPLITS}
+    segments = []
+    # Normalized segments each pending shard still waits for, and the shards waiting on each segment
+    outstanding, waiting = {}, defaultdict(list)
+    for split, shard_ids in pending.items():
+        for shard_id in shard_ids:
+            start = shard_id * SHARD_SIZE
+            needed = set()
+            for idx in range(start, min(start + SHARD_SIZE, ds[split].num_rows)):
+                segments.append(columns[split]['question'][idx])
+                segments.extend(columns[split]['choices'][idx])
+                needed.add(normalize_segment(columns[split]['question'][idx]))
+                needed.update(normalize_segment(c) for c in columns[split]['choices'][idx])
+            outstanding[(split, shard_id)] = needed
+            for text in needed:
+                waiting[text].append((split, shard_id))
+
+    translations = {}
+    progress = tqdm(total=len(outstanding), desc="Writing shards")
+
+    def write_ready(split: str, shard_id: int):
+        start = shard_id * SHARD_SIZE
+        rows = [
+            {
+                'question': translations[normalize_segment(columns[split]['question'][idx])],
+                'subject': columns[split]['subject'][idx],
+                'choices': [translations[normalize_segment(c)] for c in columns[split]['choices'][idx]],
+                'answer': columns[split]['answer'][idx],
+                'id': idx
             }
-            for i, (orig_choice, trans_choice) in enumerate(zip(ds[split][entry['id']]["choices"], entry["choices"])):
-                row[f"Original Choice {i+1}"] = orig_choice
-                row[f"Translated Choice {i+1}"] = trans_choice
+            for idx in range(start, min(start + SHARD_SIZE, ds[split].num_rows))
+        ]
+        write_shard(shard_path(shard_dir, split, shard_id), rows)
+        manifest["splits"][split]["completed"].append(shard_id)
+        save_manifest(shard_dir, manifest)
+        del outstanding[(split, shard_id)]
+        progress.update(1)
+
+    def on_translated(done: Dict[str, str]):
+        translations.update(done)
+        for text in done:
+            for key in waiting.pop(text, ()):
+                outstanding[key].discard(text)
+                if not outstanding[key]:
+                    write_ready(*key)
+
+    tm = TranslationMemory(tm_path)
+    try:
+        translate_unique(segments, tm, on_translated=on_translated)
+    finally:
+        tm.close()
+        progress.close()
+
+    if outstanding:
+        logging.warning(
+            f"{len(outstanding)} shards still have untranslated segments and were not written; "
+            f"rerun to resume from {shard_dir}/manifest.json"
+        )
+
+    return load_shards(shard_dir, manifest)
+
+
+def comparison_frame(translated_data, ds) -> pd.DataFrame:
+    """Join translated rows to their originals by id using column operations only."""
+    frames = []
+    for split, data in translated_data.items():
+        translated = data.select_columns(['subject', 'id', 'question', 'choices']).to_pandas()
+        original = ds[split].select_columns(['question', 'choices']).to_pandas()
+        original['id'] = range(len(original))
+
+        merged = translated.merge(original, on='id', how='left', suffixes=('_translated', '_original'))
+        frame = pd.DataFrame({
+            "Split": split,
+            "Subject": merged['subject'],
+            "Question ID": merged['id'],
+            "Original Question": merged['question_original'],
+            "Translated Question": merged['question_translated']
+        })
+        orig_choices = pd.DataFrame(merged['choices_original'].tolist(), index=merged.index)
+        trans_choices = pd.DataFrame(merged['choices_translated'].tolist(), index=merged.index)
+        for i in orig_choices.columns:
+            frame[f"Original Choice {i+1}"] = orig_choices[i]
+            frame[f"Translated Choice {i+1}"] = trans_choices.get(i)
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_comparison(translated_data, ds, output_path: str = "mmlu_translation_comparison.parquet"):
+    """Write the original/translated comparison as Parquet or CSV; .xlsx goes through a streaming writer."""
+    df = comparison_frame(translated_data, ds)
+    extension = os.path.splitext(output_path)[1].lower()
 
-            rows.append(row)
+    if extension == ".parquet":
+        df.to_parquet(output_path, index=False)
+    elif extension == ".csv":
+        df.to_csv(output_path, index=False)
+    elif extension == ".xlsx":
+        import xlsxwriter
+        # constant_memory flushes each row once the next one starts instead of holding the sheet in memory,
+        # so rows are written strictly in order here; pandas' to_excel writes column by column and would lose cells
+        workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+        try:
+            worksheet = workbook.add_worksheet()
+            worksheet.write_row(0, 0, list(df.columns))
+            for row_idx, row in enumerate(df.itertuples(index=False), start=1):
+                worksheet.write_row(row_idx, 0, [None if pd.isna(value) else value for value in row])
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported comparison format: {extension}. Use .parquet, .csv or .xlsx")
 
-    df = pd.DataFrame(rows)
-    df.to_excel("mmlu_translation_comparison.xlsx", index=False)
-    logging.info("Translation and comparison process complete. The Excel file 'mmlu_translation_comparison.xlsx' has been created.")
+    logging.info(f"Comparison of {len(df)} rows has been written to '{output_path}'.")
 
 
 def main():
@@ -107,7 +443,7 @@ def main():
     translated_dataset_dict.save_to_disk("translated_mmlu_dataset")
     logging.info("Translated dataset has been saved to disk as 'translated_mmlu_dataset'.")
 
-    save_to_excel(translated_dataset_dict, ds)
+    export_comparison(translated_dataset_dict, ds)
 
 
 if __name__ == "__main__":
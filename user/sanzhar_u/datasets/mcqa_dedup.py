@@ -0,0 +1,230 @@
+import json
+import logging
+import pickle
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("dedup_log.log"),
+        logging.StreamHandler()
+    ]
+)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def parse_response(response: str) -> List[dict]:
+    """Extract the question list from a raw model response (optionally ```json fenced)."""
+    if not response:
+        return []
+    text = response.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.lower().startswith("json"):
+            text = text[4:]
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end == -1:
+        return []
+    try:
+        return json.loads(text[start:end + 1]).get("questions", [])
+    except json.JSONDecodeError:
+        return []
+
+
+def load_questions(input_files: List[str]) -> List[dict]:
+    """Flatten the generation pickles into one list of questions tagged with their source row."""
+    questions = []
+    for input_file in input_files:
+        with open(input_file, "rb") as f:
+            data = pickle.load(f)
+        source = Path(input_file).stem
+        for idx, response in data["responses"]:
+            for q_num, question in enumerate(parse_response(response)):
+                if not question.get("question") or not question.get("options"):
+                    continue
+                questions.append({
+                    "source": source,
+                    "row": idx,
+                    "q_num": q_num,
+                    **question
+                })
+        logging.info(f"Loaded {input_file}, total questions so far: {len(questions)}")
+    return questions
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).lower()
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def question_text(question: dict) -> str:
+    # Options are sorted so that shuffled answer orders still collide
+    options = " ".join(sorted(normalize(str(o)) for o in question["options"].values()))
+    return f"{normalize(question['question'])} {options}"
+
+
+def shingles(text: str, ngram: int) -> np.ndarray:
+    if len(text) <= ngram:
+        grams = {text}
+    else:
+        grams = {text[i:i + ngram] for i in range(len(text) - ngram + 1)}
+    return np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams),
+        dtype=np.uint64,
+        count=len(grams)
+    )
+
+
+class MinHashLSH:
+    """
+    MinHash signatures over character n-grams with banded LSH. Character n-grams
+    tolerate Kazakh suffixation, and banding keeps candidate generation roughly
+    linear in the number of questions instead of comparing every pair.
+    """
+    def __init__(self, num_perm: int = 128, bands: int = 32, ngram: int = 4, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingles(text, self.ngram)
+        # (a * x + b) mod p, computed on uint64 with wraparound like the reference datasketch scheme
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self.signature(t) for t in tqdm(texts, desc="MinHash")])
+
+    def candidate_pairs(self, signatures: np.ndarray, max_bucket: int = 64) -> set:
+        """
+        Every pair sharing a band bucket. A bucket only means one band matched, so its
+        members are not all similar to the first one and each pair is verified on its own.
+        In buckets larger than `max_bucket` each member is paired with the first
+        `max_bucket` members only, so boilerplate questions stay linear.
+        """
+        pairs = set()
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            chunk = signatures[:, band * self.rows:(band + 1) * self.rows]
+            for i, key in enumerate(map(bytes, chunk)):
+                buckets[key].append(i)
+            for members in buckets.values():
+                for position, other in enumerate(members[1:], start=1):
+                    pairs.update((first, other) for first in members[:min(position, max_bucket)])
+        return pairs
+
+
+def cluster_duplicates(
+    signatures: np.ndarray,
+    pairs: set,
+    threshold: float
+) -> Tuple[List[int], Dict[int, Tuple[int, float]]]:
+    """Union verified pairs and return (kept indices, dropped index -> (kept index, similarity))."""
+    parent = list(range(len(signatures)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        score = float(np.mean(signatures[i] == signatures[j]))
+        if score >= threshold:
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                # The earliest question stays the cluster representative
+                parent[max(ri, rj)] = min(ri, rj)
+
+    kept, dropped = [], {}
+    for idx in range(len(signatures)):
+        root = find(idx)
+        if root == idx:
+            kept.append(idx)
+        else:
+            # Similarity to the kept question itself, which may sit further away than the pair that linked them
+            dropped[idx] = (root, float(np.mean(signatures[idx] == signatures[root])))
+    return kept, dropped
+
+
+def deduplicate(
+    questions: List[dict],
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    bands: int = 32,
+    ngram: int = 4
+) -> Tuple[List[dict], pd.DataFrame]:
+    lsh = MinHashLSH(num_perm=num_perm, bands=bands, ngram=ngram)
+    signatures = lsh.signatures([question_text(q) for q in questions])
+    pairs = lsh.candidate_pairs(signatures)
+    logging.info(f"LSH produced {len(pairs)} candidate pairs for {len(questions)} questions")
+
+    kept, dropped = cluster_duplicates(signatures, pairs, threshold)
+
+    report = pd.DataFrame([
+        {
+            "dropped_source": questions[idx]["source"],
+            "dropped_row": questions[idx]["row"],
+            "dropped_question": questions[idx]["question"],
+            "kept_source": questions[root]["source"],
+            "kept_row": questions[root]["row"],
+            "kept_question": questions[root]["question"],
+            "similarity": round(score, 3)
+        }
+        for idx, (root, score) in sorted(dropped.items())
+    ])
+    return [questions[idx] for idx in kept], report
+
+
+def main(
+    input_files: Optional[List[str]] = None,
+    output_file: str = 'mcqa_deduplicated.jsonl',
+    report_file: str = 'mcqa_dedup_report.csv',
+    threshold: float = 0.8
+):
+    input_files = input_files or ['constitution_outputs.pkl', 'dastur.pkl']
+    questions = load_questions(input_files)
+
+    kept, report = deduplicate(questions, threshold=threshold)
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        for question in kept:
+            f.write(json.dumps(question, ensure_ascii=False) + "\n")
+    report.to_csv(report_file, index=False)
+
+    logging.info(
+        f"Kept {len(kept)} of {len(questions)} questions, dropped {len(report)} near-duplicates "
+        f"(threshold {threshold}). Report saved to {report_file}"
+    )
+
+
+if __name__ == "__main__":
+
+    logging.info("Dedup started.")
+    try:
+        main()
+    except Exception as e:
+        logging.critical(f"Dedup failed with error: {e}")
+    logging.info("Dedup finished.")
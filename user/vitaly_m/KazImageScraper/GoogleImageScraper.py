@@ -16,6 +16,7 @@ from PIL import Image
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -27,6 +28,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Each script below replaces a series of per-element WebDriver round-trips with one call
+THUMBNAIL_CENSUS_JS = """
+const minWidth = arguments[0];
+const found = [];
+const images = document.getElementsByTagName('img');
+let next = window.__censusNext || 0;
+for (let i = 0; i < images.length; i++) {
+    const img = images[i];
+    if (img.src && img.naturalWidth >= minWidth) {
+        // Tagged once: positions in the live list shift as previews and scrolling add images
+        if (img.dataset.censusIdx === undefined) img.dataset.censusIdx = next++;
+        found.push([img.src, img.naturalWidth, Number(img.dataset.censusIdx)]);
+    }
+}
+window.__censusNext = next;
+return found;
+"""
+SCROLL_PAGE_JS = """
+window.scrollBy(0, window.innerHeight);
+return window.scrollY + window.innerHeight >= document.documentElement.scrollHeight;
+"""
+IMAGES_LOADED_JS = """
+return Array.from(document.images)
+    .filter(img => img.getBoundingClientRect().top < window.innerHeight)
+    .every(img => img.complete);
+"""
+CLICK_THUMBNAIL_JS = """
+const img = document.querySelector('img[data-census-idx="' + arguments[0] + '"]');
+if (!img) return false;
+img.scrollIntoView({block: 'center'});
+img.click();
+return true;
+"""
+PREVIEW_IMAGES_JS = """
+return Array.from(document.querySelectorAll('img.iPVvYb'))
+    .map(img => [img.src, img.naturalWidth, img.outerHTML]);
+"""
+
 
 class GoogleImageScraper:
     """
@@ -92,6 +131,40 @@ class GoogleImageScraper:
         self.max_resolution = max_resolution
         self.max_missed = max_missed
         self.metadata = []
+        self.metadata_by_url = {}
+
+    def wait_for_images(self, timeout=1):
+        """
+        Wait until the images in or above the viewport have loaded, at most `timeout` seconds.
+        """
+        if timeout <= 0:
+            return
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script(IMAGES_LOADED_JS)
+            )
+        except TimeoutException:
+            pass
+
+    def thumbnail_census(self, wanted, min_width=80, max_scrolls=20, max_wait=5):
+        """
+        Return (src, naturalWidth, census id) for every loaded thumbnail, scrolling a page
+        at a time until `wanted` are available or the results stop growing. Waiting for
+        images to load takes at most `max_wait` seconds in total.
+        """
+        deadline = time.monotonic() + max_wait
+        self.wait_for_images(min(1, deadline - time.monotonic()))
+        thumbnails = self.driver.execute_script(THUMBNAIL_CENSUS_JS, min_width)
+        for _ in range(max_scrolls):
+            if len(thumbnails) >= wanted:
+                break
+            at_bottom = self.driver.execute_script(SCROLL_PAGE_JS)
+            self.wait_for_images(min(1, deadline - time.monotonic()))
+            previous = len(thumbnails)
+            thumbnails = self.driver.execute_script(THUMBNAIL_CENSUS_JS, min_width)
+            if at_bottom and len(thumbnails) == previous:
+                break
+        return thumbnails
 
     def find_image_urls(self):
         """
@@ -105,71 +178,49 @@ class GoogleImageScraper:
             lambda d: len(d.find_elements(By.TAG_NAME, "img")) > 10
         )
 
-        raw_thumbnails = self.driver.find_elements(By.TAG_NAME, "img")
-        logger.debug("Number of thumbnails found: %d", len(raw_thumbnails))
-
-        thumbnails = []
-        for idx, thumb in enumerate(raw_thumbnails):
-            try:
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", thumb)
-                time.sleep(0.1)
-                width = self.driver.execute_script(
-                    "return arguments[0].naturalWidth;",
-                    thumb
-                )
-                src = thumb.get_attribute("src")
-                if src and width and width >= 80:
-                    thumbnails.append(thumb)
-            except Exception:
-                continue
-
+        thumbnails = self.thumbnail_census(self.number_of_images)
         logger.info("Number of valid thumbnails: %d", len(thumbnails))
 
         image_urls = set()
         missed_count = 0
 
-        for index, thumbnail in enumerate(thumbnails):
+        for src, width, position in thumbnails:
             if len(image_urls) >= self.number_of_images:
                 break
 
             try:
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", thumbnail)
-                time.sleep(0.1)
                 try:
-                    thumbnail.click()
-                    logger.debug("Click on preview #%d", index + 1)
+                    clicked = self.driver.execute_script(CLICK_THUMBNAIL_JS, position)
                 except Exception:
+                    clicked = False
+                if not clicked:
                     missed_count += 1
                     if missed_count > self.max_missed:
                         logger.critical("Too many clicks without positive result.")
                         break
                     continue
+                logger.debug("Click on preview #%d (%dpx thumbnail)", position + 1, width)
 
                 WebDriverWait(self.driver, 5).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, "img.iPVvYb"))
                 )
-                images = self.driver.find_elements(By.CSS_SELECTOR, "img.iPVvYb")
-
-                for img in images:
-                    full_src = img.get_attribute("src")
-                    natural_width = self.driver.execute_script(
-                        "return arguments[0].naturalWidth",
-                        img
-                    )
+
+                for full_src, natural_width, outer_html in self.driver.execute_script(PREVIEW_IMAGES_JS):
                     if full_src and full_src.startswith("http") and natural_width > 300:
                         if full_src not in image_urls:
                             image_urls.add(full_src)
-                            outer_html = img.get_attribute("outerHTML")
-                            self.metadata.append({
+                            entry = {
                                 "id": len(self.metadata),
                                 "url": full_src,
                                 "html": outer_html
-                            })
+                            }
+                            self.metadata.append(entry)
+                            self.metadata_by_url[full_src] = entry
                             logger.info("[+] Saving: %s", full_src)
                         break
 
             except Exception as e:
-                logger.error("A thumbnail error #%d: %s", index + 1, e)
+                logger.error("A thumbnail error #%d: %s", position + 1, e)
                 continue
 
         logger.info("Total URLs gathered: %d", len(image_urls))
@@ -210,11 +261,10 @@ class GoogleImageScraper:
                         logger.info("Saved: %s", path)
 
                         # Update metadata
-                        for m in self.metadata:
-                            if m["url"] == image_url:
-                                m["filename"] = filename
-                                m["filepath"] = path
-                                break
+                        entry = self.metadata_by_url.get(image_url)
+                        if entry is not None:
+                            entry["filename"] = filename
+                            entry["filepath"] = path
 
                 else:
                     logger.error("Wrong status-code: %s", response.status_code)